@@ -4,9 +4,14 @@ from pydantic import BaseModel
 from typing import Dict, List, Optional, Any, Union
 import joblib
 import numpy as np
-import pandas as pd
-import requests
+import httpx
+import importlib.util
 import json
+import asyncio
+import queue
+import atexit
+import threading
+import sqlite3
 import time
 from dotenv import load_dotenv
 import os
@@ -25,6 +30,10 @@ app.add_middleware(
 model = joblib.load("rf_model.pkl")
 feature_names = list(model.feature_names_in_)
 n_features_expected = model.n_features_in_
+# Requests are packed into raw arrays in feature_names order, so drop the
+# fitted names to skip sklearn's per-call column-name check (and the
+# "X does not have valid feature names" warning on ndarray input)
+del model.feature_names_in_
 
 numeric_raw = ["age", "number_of_the_latest_pregnancy", "phq9_score"]
 label_mapping = {0: "high", 1: "low", 2: "medium"}
@@ -32,9 +41,97 @@ multi_select_groups = {"addiction", "disease_before_pregnancy", "recieved_suppor
 
 load_dotenv()
 api_key = os.getenv("MISTRAL_API_KEY")
+OPENROUTER_API_KEY = api_key
 OPENROUTER_ENDPOINT = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_MODEL = "mistralai/mixtral-8x22b-instruct"
 
+# orjson is optional; it serializes logs and prompts several times faster
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def dumps_indented(obj):
+    if ORJSON_AVAILABLE:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, option=options).decode()
+    return json.dumps(obj, indent=2)
+
+def dumps_compact(obj):
+    if ORJSON_AVAILABLE:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, option=options).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# One pooled async client for all OpenRouter calls, so connections (and
+# their TLS handshakes) are reused across requests and a slow LLM reply
+# does not hold a threadpool worker
+openrouter_client = httpx.AsyncClient(
+    http2=HTTP2_AVAILABLE,
+    timeout=45.0,
+    headers={
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "http://localhost",
+        "X-Title": "EPDS Chatbot API"
+    },
+)
+
+# Prediction logs are written by a background thread so that disk I/O
+# stays off the request path. Handlers enqueue (timestamp, payload) pairs,
+# which land as rows in a WAL-mode SQLite database (one file, no lost
+# records when two requests share a second). Inserts are committed in
+# batches of LOG_COMMIT_BATCH rows or every LOG_COMMIT_SECONDS.
+LOG_DIR = "json_logs"
+LOG_DB_PATH = os.path.join(LOG_DIR, "records.db")
+LOG_COMMIT_BATCH = 50
+LOG_COMMIT_SECONDS = 1.0
+os.makedirs(LOG_DIR, exist_ok=True)
+_log_queue = queue.Queue()
+
+def _write_logs():
+    conn = sqlite3.connect(LOG_DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS records (ts TEXT, payload TEXT)")
+    conn.commit()
+    
+    pending = 0
+    last_commit = time.monotonic()
+    while True:
+        try:
+            item = _log_queue.get(timeout=LOG_COMMIT_SECONDS)
+        except queue.Empty:
+            item = ()
+        if item is None:
+            break
+        if item:
+            ts, payload = item
+            try:
+                conn.execute("INSERT INTO records VALUES (?, ?)", (ts, dumps_compact(payload)))
+                pending += 1
+            except Exception as e:
+                print(f"Failed to write log record {ts}: {e}")
+        if pending and (pending >= LOG_COMMIT_BATCH or time.monotonic() - last_commit >= LOG_COMMIT_SECONDS):
+            conn.commit()
+            pending = 0
+            last_commit = time.monotonic()
+    
+    conn.commit()
+    conn.close()
+
+_log_writer = threading.Thread(target=_write_logs, name="json-log-writer", daemon=True)
+_log_writer.start()
+
+@atexit.register
+def _flush_logs():
+    # Let queued logs reach disk before the process exits
+    _log_queue.put(None)
+    _log_writer.join(timeout=5)
+
 def split_feature_name(feat: str):
     if "_" not in feat:
         return feat, ""
@@ -55,6 +152,16 @@ for feat in feature_names:
 for n in numeric_raw:
     groups.pop(n, None)
 
+# prefix -> option -> column index, so requests only touch the selected options
+group_option_indices = {
+    prefix: {
+        option: feature_index_map[f"{prefix}_{option}"]
+        for option in options
+        if f"{prefix}_{option}" in feature_index_map
+    }
+    for prefix, options in groups.items()
+}
+
 ui_keys = []
 for raw in numeric_raw:
     ui_keys.append(("numeric", raw))
@@ -64,6 +171,38 @@ for prefix, options in groups.items():
     else:
         ui_keys.append(("single", prefix))
 
+# Column index of each numeric feature, in ui_keys order (numeric keys come
+# first), and the option lookup for every categorical slot, so requests do
+# no dict or list lookups to place numeric values
+def numeric_target_index(i, key):
+    if key in feature_index_map:
+        return feature_index_map[key]
+    if key in feature_names:
+        return feature_names.index(key)
+    return i
+
+numeric_target_indices = np.array(
+    [numeric_target_index(i, key) for i, (kind, key) in enumerate(ui_keys) if kind == "numeric"],
+    dtype=np.intp,
+)
+categorical_slots = [
+    (i, kind, group_option_indices.get(prefix, {}))
+    for i, (kind, prefix) in enumerate(ui_keys)
+    if kind != "numeric"
+]
+
+# Request field name for each categorical feature, resolved once at startup.
+# /predict uses the PredictionRequest field names; /predict-minimal accepts
+# the shorter names sent by the frontend.
+def predict_field_name(key):
+    return key.replace("husband's_", "husband_").replace("depression_before_pregnancy_(phq2)", "depression_before_pregnancy_phq2").replace("depression_during_pregnancy_(phq2)", "depression_during_pregnancy_phq2").replace("relationship_with_the_in-laws", "relationship_with_the_in_laws").replace("relax/sleep_when_newborn_is_tended", "relax_sleep_when_newborn_is_tended").replace("relax/sleep_when_the_newborn_is_asleep", "relax_sleep_when_the_newborn_is_asleep")
+
+def minimal_field_name(key):
+    return key.replace("husband's_", "husband_").replace("'", "").replace("depression_before_pregnancy_(phq2)", "depression_history").replace("depression_during_pregnancy_(phq2)", "depression_during_pregnancy_phq2").replace("relationship_with_the_in-laws", "relationship_inlaws").replace("relax/sleep_when_newborn_is_tended", "relax_sleep_when_newborn_is_tended").replace("relax/sleep_when_the_newborn_is_asleep", "relax_sleep_when_the_newborn_is_asleep").replace("fear_of_pregnancy", "fear_pregnancy").replace("major_changes_or_losses_during_pregnancy", "major_changes").replace("diseases_during_pregnancy", "pregnancy_complications").replace("relationship_with_husband", "relationship_husband")
+
+predict_field_names = {key: predict_field_name(key) for kind, key in ui_keys if kind != "numeric"}
+minimal_field_names = {key: minimal_field_name(key) for kind, key in ui_keys if kind != "numeric"}
+
 class PredictionRequest(BaseModel):
     age: float
     number_of_the_latest_pregnancy: float
@@ -133,49 +272,102 @@ class ChatResponse(BaseModel):
     response: str
     timestamp: str
 
-def map_to_model_dataframe(ui_values):
-    arr = np.zeros((1, n_features_expected), dtype=float)
+# Model input: a single-row float32 buffer reused across requests. The
+# handlers are async and all run on the event loop thread; each one packs
+# this row and predict_batched copies it into the batch queue before the
+# next await, so one shared buffer is enough. The micro-batcher below then
+# scores the queued copies off the loop with asyncio.to_thread.
+_model_input_row = np.zeros((1, n_features_expected), dtype=np.float32)
+
+# The feature schema is fixed once the model is loaded, so the per-request
+# packing function is generated here with every column index and option
+# lookup written in: no loops over ui_keys and no per-request arrays. The
+# generated pack_request(out, ui_values) zeroes the row, writes the numeric
+# values, then sets 1.0 for every selected categorical option.
+def build_pack_request():
+    lines = ["def pack_request(out, ui_values):", "    out[:] = 0.0"]
+    namespace = {}
     
-    for i, (kind, key) in enumerate(ui_keys):
-        if kind != "numeric":
-            continue
-        try:
-            val = float(ui_values[i])
-        except Exception:
-            val = 0.0
-        if key in feature_index_map:
-            arr[0, feature_index_map[key]] = val
-        else:
-            if key in feature_names:
-                arr[0, feature_names.index(key)] = val
-            else:
-                arr[0, i] = val
+    for i, col in enumerate(numeric_target_indices):
+        lines += [
+            "    try:",
+            f"        out[{int(col)}] = float(ui_values[{i}])",
+            "    except Exception:",
+            f"        out[{int(col)}] = 0.0",
+        ]
     
-    for i, (kind, prefix) in enumerate(ui_keys):
-        if kind == "numeric":
-            continue
-        user_val = ui_values[i]
+    for i, kind, option_indices in categorical_slots:
+        options_name = f"options_{i}"
+        namespace[options_name] = option_indices
+        lines.append(f"    user_val = ui_values[{i}]")
         if kind == "single":
-            selected_list = [user_val] if (user_val is not None and user_val != "") else []
+            lines += [
+                "    if isinstance(user_val, str):",
+                f"        idx = {options_name}.get(user_val)",
+                "        if idx is not None:",
+                "            out[idx] = 1.0",
+            ]
         else:
-            selected_list = user_val if isinstance(user_val, (list, tuple)) else []
+            lines += [
+                "    if isinstance(user_val, (list, tuple)):",
+                "        for option in user_val:",
+                "            if isinstance(option, str):",
+                f"                idx = {options_name}.get(option)",
+                "                if idx is not None:",
+                "                    out[idx] = 1.0",
+            ]
+    
+    exec(compile("\n".join(lines), "<pack_request>", "exec"), namespace)
+    return namespace["pack_request"]
+
+pack_request = build_pack_request()
+
+def map_to_model_array(ui_values):
+    pack_request(_model_input_row[0], ui_values)
+    return _model_input_row
+
+# Micro-batching for predictions: concurrent /predict and /predict-minimal
+# calls are queued and scored together with one predict_proba call. While a
+# batch is running, newly arriving rows wait in the queue and form the next
+# batch, so batches grow with load without adding latency to a lone request.
+MAX_PREDICT_BATCH = 64
+_predict_queue = None
+_predict_batcher = None
+
+async def _run_predict_batcher(pending):
+    while True:
+        batch = [await pending.get()]
+        while len(batch) < MAX_PREDICT_BATCH and not pending.empty():
+            batch.append(pending.get_nowait())
+        
+        X = np.stack([row for row, _ in batch])
+        try:
+            proba = await asyncio.to_thread(model.predict_proba, X)
+            preds = model.classes_.take(np.argmax(proba, axis=1))
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            continue
         
-        for option in groups.get(prefix, []):
-            full_col = f"{prefix}_{option}"
-            if full_col in feature_index_map:
-                idx = feature_index_map[full_col]
-                arr[0, idx] = 1.0 if option in selected_list else 0.0
+        for i, (_, fut) in enumerate(batch):
+            if not fut.done():
+                fut.set_result((preds[i], proba[i]))
+
+async def predict_batched(X):
+    """Queue one packed feature row; returns (prediction, class probabilities)."""
+    global _predict_queue, _predict_batcher
+    loop = asyncio.get_running_loop()
+    if _predict_batcher is None or _predict_batcher.done() or _predict_batcher.get_loop() is not loop:
+        _predict_queue = asyncio.Queue()
+        _predict_batcher = loop.create_task(_run_predict_batcher(_predict_queue))
     
-    df = pd.DataFrame(arr, columns=feature_names)
-    return df
+    fut = loop.create_future()
+    # Copy: the shared input row is reused by the next request
+    await _predict_queue.put((X[0].copy(), fut))
+    return await fut
 
-def query_openrouter(messages: List[Dict], max_tokens: int = 300, retries: int = 3):
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "http://localhost",
-        "X-Title": "EPDS Chatbot API"
-    }
+async def query_openrouter(messages: List[Dict], max_tokens: int = 300, retries: int = 3):
     payload = {
         "model": OPENROUTER_MODEL,
         "messages": messages,
@@ -184,12 +376,13 @@ def query_openrouter(messages: List[Dict], max_tokens: int = 300, retries: int =
     
     for attempt in range(retries):
         try:
-            r = requests.post(OPENROUTER_ENDPOINT, json=payload, headers=headers, timeout=45)
+            r = await openrouter_client.post(OPENROUTER_ENDPOINT, json=payload)
             r.raise_for_status()
             return r.json()["choices"][0]["message"]["content"]
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             if attempt < retries - 1:
-                time.sleep(1.5)
+                # Exponential backoff: 1.5s, 3s, ...
+                await asyncio.sleep(1.5 * 2 ** attempt)
                 continue
             return "I'm having trouble connecting right now. Please try again."
         except Exception as e:
@@ -221,7 +414,7 @@ def get_features():
     }
 
 @app.post("/predict", response_model=PredictionResponse)
-def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest):
     try:
         ui_values = []
         ui_values.append(request.age)
@@ -233,7 +426,7 @@ def predict(request: PredictionRequest):
             if kind == "numeric":
                 continue
             
-            field_name = key.replace("husband's_", "husband_").replace("depression_before_pregnancy_(phq2)", "depression_before_pregnancy_phq2").replace("depression_during_pregnancy_(phq2)", "depression_during_pregnancy_phq2").replace("relationship_with_the_in-laws", "relationship_with_the_in_laws").replace("relax/sleep_when_newborn_is_tended", "relax_sleep_when_newborn_is_tended").replace("relax/sleep_when_the_newborn_is_asleep", "relax_sleep_when_the_newborn_is_asleep")
+            field_name = predict_field_names[key]
             
             value = request_dict.get(field_name)
             if value is None:
@@ -243,8 +436,8 @@ def predict(request: PredictionRequest):
                     value = groups.get(key, [""])[0] if groups.get(key) else ""
             ui_values.append(value)
         
-        X_df = map_to_model_dataframe(ui_values)
-        pred_numeric = model.predict(X_df)[0]
+        X = map_to_model_array(ui_values)
+        pred_numeric, _ = await predict_batched(X)
         pred_label = label_mapping.get(int(pred_numeric), str(pred_numeric))
         
         json_payload = {
@@ -253,11 +446,9 @@ def predict(request: PredictionRequest):
             "numeric_prediction": int(pred_numeric)
         }
         
-        os.makedirs("json_logs", exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_path = f"json_logs/record_{timestamp}.json"
-        with open(log_path, "w") as f:
-            json.dump(json_payload, f, indent=2)
+        now = datetime.now()
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        _log_queue.put_nowait((now.isoformat(), json_payload))
         
         return PredictionResponse(
             epds_prediction=pred_label,
@@ -269,7 +460,7 @@ def predict(request: PredictionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/predict-minimal")
-def predict_minimal(request: Dict[str, Any]):
+async def predict_minimal(request: Dict[str, Any]):
     try:
         age = float(request.get("age", 25))
         number_of_pregnancies = float(request.get("number_of_pregnancies", 1))
@@ -281,7 +472,7 @@ def predict_minimal(request: Dict[str, Any]):
             if kind == "numeric":
                 continue
             
-            field_name = key.replace("husband's_", "husband_").replace("'", "").replace("depression_before_pregnancy_(phq2)", "depression_history").replace("depression_during_pregnancy_(phq2)", "depression_during_pregnancy_phq2").replace("relationship_with_the_in-laws", "relationship_inlaws").replace("relax/sleep_when_newborn_is_tended", "relax_sleep_when_newborn_is_tended").replace("relax/sleep_when_the_newborn_is_asleep", "relax_sleep_when_the_newborn_is_asleep").replace("fear_of_pregnancy", "fear_pregnancy").replace("major_changes_or_losses_during_pregnancy", "major_changes").replace("diseases_during_pregnancy", "pregnancy_complications").replace("relationship_with_husband", "relationship_husband")
+            field_name = minimal_field_names[key]
             
             value = request.get(field_name)
             if value is None:
@@ -291,9 +482,8 @@ def predict_minimal(request: Dict[str, Any]):
                     value = groups.get(key, [""])[0] if groups.get(key) else ""
             ui_values.append(value)
         
-        X_df = map_to_model_dataframe(ui_values)
-        pred_numeric = model.predict(X_df)[0]
-        pred_proba = model.predict_proba(X_df)[0]
+        X = map_to_model_array(ui_values)
+        pred_numeric, pred_proba = await predict_batched(X)
         pred_label = label_mapping.get(int(pred_numeric), str(pred_numeric))
         
         probabilities = {
@@ -307,11 +497,7 @@ def predict_minimal(request: Dict[str, Any]):
             "probabilities": probabilities
         }
         
-        os.makedirs("json_logs", exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_path = f"json_logs/record_{timestamp}.json"
-        with open(log_path, "w") as f:
-            json.dump(json_payload, f, indent=2)
+        _log_queue.put_nowait((datetime.now().isoformat(), json_payload))
         
         return {
             "prediction": pred_label,
@@ -324,14 +510,14 @@ def predict_minimal(request: Dict[str, Any]):
         return {"error": str(e)}
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     try:
         if not request.patient_json:
             raise HTTPException(status_code=400, detail="Patient JSON is required")
         
         system_msg = (
             "You are a mental-health assistant. Use ONLY the provided patient JSON data:\n\n"
-            f"{json.dumps(request.patient_json, indent=2)}\n\n"
+            f"{dumps_indented(request.patient_json)}\n\n"
             "Do NOT invent information. Be empathetic, supportive, and safe."
         )
         
@@ -340,7 +526,7 @@ def chat(request: ChatRequest):
         for msg in request.messages:
             messages.append({"role": msg.role, "content": msg.content})
         
-        bot_reply = query_openrouter(messages, max_tokens=request.max_tokens)
+        bot_reply = await query_openrouter(messages, max_tokens=request.max_tokens)
         
         return ChatResponse(
             response=bot_reply,
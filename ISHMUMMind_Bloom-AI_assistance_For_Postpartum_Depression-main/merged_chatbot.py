@@ -1,17 +1,26 @@
 import joblib
 import numpy as np
-import pandas as pd
 import gradio as gr
-import requests
+import httpx
+import importlib.util
+import asyncio
 import traceback
 import json
 from dotenv import load_dotenv
 import os
 import time
+import atexit
+import queue
+import threading
+from functools import lru_cache
 
 model = joblib.load("rf_model.pkl")
 feature_names = list(model.feature_names_in_)
 n_features_expected = model.n_features_in_
+# Predictions are made on a raw array in feature_names order, so drop the
+# fitted names to skip sklearn's per-call column-name check (and the
+# "X does not have valid feature names" warning on ndarray input)
+del model.feature_names_in_
 
 numeric_raw = ["age", "number_of_the_latest_pregnancy", "phq9_score"]
 label_mapping = {0: "high", 1: "low", 2: "medium"}
@@ -19,9 +28,51 @@ multi_select_groups = {"addiction", "disease_before_pregnancy", "recieved_suppor
 
 load_dotenv()
 api_key = os.getenv("MISTRAL_API_KEY")
+OPENROUTER_API_KEY = api_key
 OPENROUTER_ENDPOINT = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_MODEL = "mistralai/mixtral-8x22b-instruct"
 
+# orjson is optional; it serializes logs and prompts several times faster
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def dumps_indented(obj):
+    if ORJSON_AVAILABLE:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, option=options).decode()
+    return json.dumps(obj, indent=2)
+
+def dumps_compact(obj):
+    if ORJSON_AVAILABLE:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, option=options).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+def loads(data):
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# One pooled async client for all OpenRouter calls. Chat turns (and
+# retries) reuse its connections, and concurrent users' LLM calls share
+# the event loop instead of each holding a worker thread while waiting.
+openrouter_client = httpx.AsyncClient(
+    http2=HTTP2_AVAILABLE,
+    timeout=45.0,
+    headers={
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "http://localhost",
+        "X-Title": "EPDS Chatbot"
+    },
+)
+
 def split_feature_name(feat: str):
     if "_" not in feat:
         return feat, ""
@@ -59,65 +110,132 @@ for prefix, options in groups.items():
         gr_inputs.append(gr.Dropdown(options, label=display_label, value=options[0]))
         ui_keys.append(("single", prefix))
 
-def map_to_model_dataframe(ui_values):
-    arr = np.zeros((1, n_features_expected), dtype=float)
-    for i, (kind, key) in enumerate(ui_keys):
-        if kind != "numeric":
-            continue
+# Single-row model input, reused for every prediction. Gradio runs the
+# predict handler one click at a time (default concurrency limit of 1).
+_ROW = np.zeros((1, n_features_expected), dtype=np.float32)
+
+# Where each UI slot lands in the model row, resolved once at startup:
+# (ui index, column) for numeric inputs and (ui index, kind, option ->
+# column) for categorical ones, so a click only touches selected options.
+# Numeric names such as "phq9_score" also split into a one-hot group
+# ("phq9" / "score"); that group is written last and owns the column, so
+# its numeric value is cleared before the selected options are set.
+def numeric_target_index(i, key):
+    if key in feature_index_map:
+        return feature_index_map[key]
+    if key in feature_names:
+        return feature_names.index(key)
+    return i
+
+numeric_plan = [
+    (i, numeric_target_index(i, key))
+    for i, (kind, key) in enumerate(ui_keys)
+    if kind == "numeric"
+]
+numeric_columns = {col for _, col in numeric_plan}
+option_plan = []
+for i, (kind, prefix) in enumerate(ui_keys):
+    if kind == "numeric":
+        continue
+    option_indices = {
+        option: feature_index_map[f"{prefix}_{option}"]
+        for option in groups.get(prefix, [])
+        if f"{prefix}_{option}" in feature_index_map
+    }
+    owned_numeric = [col for col in option_indices.values() if col in numeric_columns]
+    option_plan.append((i, kind, option_indices, owned_numeric))
+
+def map_to_model_array(ui_values):
+    arr = _ROW
+    arr.fill(0.0)
+    row = arr[0]
+    for i, col in numeric_plan:
         try:
             val = float(ui_values[i])
         except Exception:
             val = 0.0
-        if key in feature_index_map:
-            arr[0, feature_index_map[key]] = val
-        else:
-            if key in feature_names:
-                arr[0, feature_names.index(key)] = val
-            else:
-                arr[0, i] = val
-    for i, (kind, prefix) in enumerate(ui_keys):
-        if kind == "numeric":
-            continue
+        row[col] = val
+    for i, kind, option_indices, owned_numeric in option_plan:
+        for col in owned_numeric:
+            row[col] = 0.0
         user_val = ui_values[i]
         if kind == "single":
-            selected_list = [user_val] if (user_val is not None and user_val != "") else []
+            selected_list = (user_val,)
         else:
-            selected_list = user_val if isinstance(user_val, (list, tuple)) else []
-        for option in groups.get(prefix, []):
-            full_col = f"{prefix}_{option}"
-            if full_col in feature_index_map:
-                idx = feature_index_map[full_col]
-                arr[0, idx] = 1.0 if option in selected_list else 0.0
-    df = pd.DataFrame(arr, columns=feature_names)
-    return df
+            selected_list = user_val if isinstance(user_val, (list, tuple)) else ()
+        for option in selected_list:
+            idx = option_indices.get(option) if isinstance(option, str) else None
+            if idx is not None:
+                row[idx] = 1.0
+    return arr
+
+# Prediction records are appended as JSON lines to one buffered log file
+# opened at startup, instead of creating a new file per click. A
+# background thread serialises and writes them, so the click handler only
+# enqueues the record.
+os.makedirs("json_logs", exist_ok=True)
+_LOG_FH = open("json_logs/records.jsonl", "a", buffering=1 << 16)
+_log_queue = queue.SimpleQueue()
+
+def _write_logs():
+    while True:
+        record = _log_queue.get()
+        if record is None:
+            break
+        try:
+            _LOG_FH.write(dumps_compact(record) + "\n")
+        except Exception as e:
+            print(f"Failed to write prediction log: {e}")
+    _LOG_FH.close()
+
+_log_writer = threading.Thread(target=_write_logs, name="json-log-writer", daemon=True)
+_log_writer.start()
+
+@atexit.register
+def _flush_logs():
+    # Let queued records reach disk before the process exits
+    _log_queue.put(None)
+    _log_writer.join(timeout=5)
+
+# Repeat clicks with the same form values reuse the model's answer. Inputs
+# are normalised to a hashable key first; multi-select order does not
+# affect the encoded row, so those lists are sorted.
+def normalize_inputs(ui_inputs):
+    return tuple(
+        tuple(sorted(v, key=str)) if isinstance(v, (list, tuple)) else v
+        for v in ui_inputs
+    )
+
+@lru_cache(maxsize=64)
+def _predict_cached(normalized_inputs):
+    X = map_to_model_array(normalized_inputs)
+    return model.predict(X)[0]
+
+def predict_numeric(ui_inputs):
+    try:
+        key = normalize_inputs(ui_inputs)
+        hash(key)
+    except TypeError:
+        return model.predict(map_to_model_array(ui_inputs))[0]
+    return _predict_cached(key)
 
 def generate_prediction(*ui_inputs):
     try:
-        X_df = map_to_model_dataframe(ui_inputs)
-        pred_numeric = model.predict(X_df)[0]
+        pred_numeric = predict_numeric(ui_inputs)
         pred_label = label_mapping.get(int(pred_numeric), str(pred_numeric))
         json_payload = {
             "user_inputs": {key[1]: ui_inputs[i] for i, key in enumerate(ui_keys)},
             "epds_prediction": pred_label,
             "numeric_prediction": int(pred_numeric)
         }
-        json_text = json.dumps(json_payload, indent=2)
-        os.makedirs("json_logs", exist_ok=True)
-        log_path = f"json_logs/record_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(log_path, "w") as f:
-            f.write(json_text)
+        record = {"timestamp": time.strftime("%Y%m%d_%H%M%S"), **json_payload}
+        _log_queue.put(record)
         return json_payload, f"✅ EPDS Prediction: **{pred_label.upper()}**\n\nYou can now chat with the assistant below.", gr.update(interactive=True), gr.update(interactive=True)
     except Exception as e:
         tb = traceback.format_exc()
         return None, f"❌ Error: {e}\n\n{tb}", gr.update(interactive=False), gr.update(interactive=False)
 
-def query_openrouter(messages, max_tokens=300, retries=3):
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "http://localhost",
-        "X-Title": "EPDS Chatbot"
-    }
+async def query_openrouter(messages, max_tokens=300, retries=3):
     payload = {
         "model": OPENROUTER_MODEL,
         "messages": messages,
@@ -125,12 +243,12 @@ def query_openrouter(messages, max_tokens=300, retries=3):
     }
     for attempt in range(retries):
         try:
-            r = requests.post(OPENROUTER_ENDPOINT, json=payload, headers=headers, timeout=45)
+            r = await openrouter_client.post(OPENROUTER_ENDPOINT, json=payload)
             r.raise_for_status()
-            return r.json()["choices"][0]["message"]["content"]
-        except requests.exceptions.Timeout:
+            return loads(r.content)["choices"][0]["message"]["content"]
+        except httpx.TimeoutException:
             if attempt < retries - 1:
-                time.sleep(1.5)
+                await asyncio.sleep(1.5)
                 continue
             return "I'm having trouble connecting right now. Please try again."
         except Exception as e:
@@ -145,25 +263,41 @@ def user_send(message, history, patient_json):
     history = history + [[message, None]]
     return history, ""
 
-def bot_respond(history, patient_json):
+# System prompts by patient record. Gradio hands the same patient_json
+# object back on every chat turn, so its JSON is serialised once per
+# prediction. Entries keep a reference to the record, so an id is never
+# reused while it is cached.
+SYSTEM_PROMPT_CACHE_SIZE = 64
+_system_prompts = {}
+
+def system_prompt_for(patient_json):
+    cached = _system_prompts.get(id(patient_json))
+    if cached is not None and cached[0] is patient_json:
+        return cached[1]
+    system_msg = (
+        "You are a mental-health assistant. Use ONLY the provided patient JSON data:\n\n"
+        f"{dumps_indented(patient_json)}\n\n"
+        "Do NOT invent information. Be empathetic, supportive, and safe."
+    )
+    if len(_system_prompts) >= SYSTEM_PROMPT_CACHE_SIZE:
+        _system_prompts.pop(next(iter(_system_prompts)))
+    _system_prompts[id(patient_json)] = (patient_json, system_msg)
+    return system_msg
+
+async def bot_respond(history, patient_json):
     if patient_json is None:
         return history
     if not history or history[-1][1] is not None:
         return history
     user_message = history[-1][0]
-    system_msg = (
-        "You are a mental-health assistant. Use ONLY the provided patient JSON data:\n\n"
-        f"{json.dumps(patient_json, indent=2)}\n\n"
-        "Do NOT invent information. Be empathetic, supportive, and safe."
-    )
-    messages = [{"role": "system", "content": system_msg}]
+    messages = [{"role": "system", "content": system_prompt_for(patient_json)}]
     for user_msg, bot_msg in history[:-1]:
         if user_msg:
             messages.append({"role": "user", "content": user_msg})
         if bot_msg:
             messages.append({"role": "assistant", "content": bot_msg})
     messages.append({"role": "user", "content": user_message})
-    bot_reply = query_openrouter(messages)
+    bot_reply = await query_openrouter(messages)
     history[-1][1] = bot_reply
     return history
 
@@ -4,262 +4,276 @@ Admin Dashboard Endpoints for Monitoring Online Learning
 Add these to main.py for dashboard monitoring.
 
 Usage in main.py:
-    from admin_dashboard import get_admin_dashboard
+    from admin_dashboard import get_admin_dashboard, dashboard_etag, etag_matches, DASHBOARD_CSS, DASHBOARD_CSS_HEADERS
     
     @app.get("/admin/dashboard", response_class=HTMLResponse)
-    def admin_dashboard():
-        return get_admin_dashboard()
+    def admin_dashboard(request: Request):
+        stats = get_statistics()
+        headers = {"ETag": dashboard_etag(stats), "Cache-Control": "private, max-age=30"}
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(get_admin_dashboard(stats), headers=headers)
+    
+    @app.get("/admin/dashboard.css")
+    def admin_dashboard_css():
+        return Response(DASHBOARD_CSS, media_type="text/css", headers=DASHBOARD_CSS_HEADERS)
 """
 
-from fastapi.responses import HTMLResponse
+import hashlib
+import time
+from functools import lru_cache
 from datetime import datetime
+from typing import Dict, Optional
 from database import get_statistics
 
+# Rendered dashboards are reused for identical stats within this window
+DASHBOARD_CACHE_SECONDS = 30
 
-def get_admin_dashboard() -> str:
-    """Generate admin dashboard HTML."""
-    
-    stats = get_statistics()
-    
-    # Determine status colors
-    prediction_status = "✅ Active" if stats['total_predictions'] > 0 else "⏳ Waiting"
-    feedback_status = "✅ Collecting" if stats['total_feedback'] > 0 else "⏳ Pending"
-    feedback_rate_color = "#4caf50" if stats['feedback_rate'] >= 20 else "#ff9800" if stats['feedback_rate'] >= 10 else "#f44336"
-    retrain_ready = "✅ Yes" if stats['total_feedback'] >= 20 else "❌ Not Yet"
-    
-    html_content = f"""
+
+# Static page head; only the body depends on stats. The stylesheet is
+# served separately (relative to /admin/dashboard) so browsers cache it
+# across the page's auto-refreshes.
+DASHBOARD_HEAD = """
     <! DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Mind Bloom - Online Learning Dashboard</title>
-        <style>
-            * {{
+        <link rel="stylesheet" href="dashboard.css">"""
+
+DASHBOARD_CSS_HEADERS = {"Cache-Control": "public, max-age=86400"}
+
+DASHBOARD_CSS = """
+            * {
                 margin: 0;
                 padding:  0;
                 box-sizing: border-box;
-            }}
+            }
             
-            body {{
+            body {
                 font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                 background:  linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 min-height: 100vh;
                 padding: 20px;
-            }}
+            }
             
-            .container {{
+            .container {
                 max-width: 1200px;
                 margin: 0 auto;
-            }}
+            }
             
-            .header {{
+            .header {
                 background: white;
                 padding: 30px;
                 border-radius: 10px;
                 box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
                 margin-bottom: 30px;
-            }}
+            }
             
-            .header h1 {{
+            .header h1 {
                 color: #667eea;
                 font-size: 2.5em;
                 margin-bottom: 10px;
-            }}
+            }
             
-            .header p {{
+            .header p {
                 color: #666;
                 font-size: 1.1em;
-            }}
+            }
             
-            .metrics {{
+            .metrics {
                 display: grid;
                 grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
                 gap: 20px;
                 margin-bottom: 30px;
-            }}
+            }
             
-            . metric-card {{
+            . metric-card {
                 background: white;
                 padding: 25px;
                 border-radius: 10px;
                 box-shadow:  0 4px 6px rgba(0, 0, 0, 0.1);
                 border-left: 5px solid #667eea;
-            }}
+            }
             
-            .metric-card h3 {{
+            .metric-card h3 {
                 color: #666;
                 font-size: 0.9em;
                 text-transform: uppercase;
                 margin-bottom: 15px;
                 letter-spacing: 1px;
-            }}
+            }
             
-            . metric-value {{
+            . metric-value {
                 font-size: 2.5em;
                 font-weight: bold;
                 color: #667eea;
                 margin-bottom: 10px;
-            }}
+            }
             
-            .metric-status {{
+            .metric-status {
                 font-size: 0.9em;
                 color: #999;
-            }}
+            }
             
-            .metric-card.predictions {{ border-left-color: #667eea; }}
-            .metric-card.feedback {{ border-left-color: #f093fb; }}
-            .metric-card.rate {{ border-left-color: #4facfe; }}
-            .metric-card.confidence {{ border-left-color: #43e97b; }}
+            .metric-card.predictions { border-left-color: #667eea; }
+            .metric-card.feedback { border-left-color: #f093fb; }
+            .metric-card.rate { border-left-color: #4facfe; }
+            .metric-card.confidence { border-left-color: #43e97b; }
             
-            .status-section {{
+            .status-section {
                 background: white;
                 padding: 25px;
                 border-radius: 10px;
                 box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
                 margin-bottom: 30px;
-            }}
+            }
             
-            .status-section h2 {{
+            .status-section h2 {
                 color: #667eea;
                 margin-bottom: 20px;
                 font-size: 1.5em;
-            }}
+            }
             
-            table {{
+            table {
                 width: 100%;
                 border-collapse: collapse;
                 margin-bottom: 20px;
-            }}
+            }
             
-            th {{
+            th {
                 background: #f5f5f5;
                 padding: 15px;
                 text-align: left;
                 font-weight: 600;
                 color: #333;
                 border-bottom: 2px solid #ddd;
-            }}
+            }
             
-            td {{
+            td {
                 padding: 12px 15px;
                 border-bottom: 1px solid #eee;
-            }}
+            }
             
-            tr:hover {{
+            tr:hover {
                 background: #f9f9f9;
-            }}
+            }
             
-            .status-badge {{
+            .status-badge {
                 display: inline-block;
                 padding: 5px 12px;
                 border-radius:  20px;
                 font-size:  0.85em;
                 font-weight: 600;
-            }}
+            }
             
-            .badge-active {{
+            .badge-active {
                 background: #e8f5e9;
                 color: #2e7d32;
-            }}
+            }
             
-            .badge-pending {{
+            .badge-pending {
                 background: #fff3e0;
                 color: #e65100;
-            }}
+            }
             
-            .badge-ready {{
+            .badge-ready {
                 background: #e8f5e9;
                 color: #2e7d32;
-            }}
+            }
             
-            .badge-not-ready {{
+            .badge-not-ready {
                 background: #ffebee;
                 color: #c62828;
-            }}
+            }
             
-            .progress-section {{
+            .progress-section {
                 background: white;
                 padding: 25px;
                 border-radius: 10px;
                 box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
                 margin-bottom: 30px;
-            }}
+            }
             
-            .progress-item {{
+            .progress-item {
                 margin-bottom: 20px;
-            }}
+            }
             
-            .progress-label {{
+            .progress-label {
                 display: flex;
                 justify-content: space-between;
                 margin-bottom: 8px;
                 font-size: 0.95em;
-            }}
+            }
             
-            .progress-bar {{
+            .progress-bar {
                 width: 100%;
                 height: 8px;
                 background: #eee;
                 border-radius: 4px;
                 overflow:  hidden;
-            }}
+            }
             
-            .progress-fill {{
+            .progress-fill {
                 height: 100%;
                 background: linear-gradient(90deg, #667eea, #764ba2);
                 border-radius: 4px;
                 transition: width 0.3s ease;
-            }}
+            }
             
-            .info-box {{
+            .info-box {
                 background: #e3f2fd;
                 border-left: 4px solid #2196f3;
                 padding:  15px;
                 border-radius: 4px;
                 margin-bottom: 20px;
                 color: #0d47a1;
-            }}
+            }
             
-            .warning-box {{
+            .warning-box {
                 background: #fff3e0;
                 border-left: 4px solid #ff9800;
                 padding:  15px;
                 border-radius: 4px;
                 margin-bottom: 20px;
                 color: #e65100;
-            }}
+            }
             
-            .success-box {{
+            .success-box {
                 background: #e8f5e9;
                 border-left: 4px solid #4caf50;
                 padding: 15px;
                 border-radius: 4px;
                 margin-bottom: 20px;
                 color: #2e7d32;
-            }}
+            }
             
-            .footer {{
+            .footer {
                 text-align: center;
                 color: white;
                 margin-top: 40px;
                 padding: 20px;
-            }}
+            }
             
-            .refresh-info {{
+            .refresh-info {
                 font-size: 0.85em;
                 color: #999;
                 margin-top: 10px;
-            }}
+            }
             
-            .chart-section {{
+            .chart-section {
                 background: white;
                 padding: 25px;
                 border-radius: 10px;
                 box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
                 margin-bottom: 30px;
-            }}
-        </style>
+            }"""
+
+
+# Stats-dependent page body, filled by _render_dashboard_body with
+# str.format_map (literal braces in the script are doubled)
+DASHBOARD_BODY_TEMPLATE = """
     </head>
     <body>
         <div class="container">
@@ -273,25 +287,25 @@ def get_admin_dashboard() -> str:
             <div class="metrics">
                 <div class="metric-card predictions">
                     <h3>Total Predictions</h3>
-                    <div class="metric-value">{stats['total_predictions']}</div>
+                    <div class="metric-value">{total_predictions}</div>
                     <div class="metric-status">{prediction_status}</div>
                 </div>
                 
                 <div class="metric-card feedback">
                     <h3>Feedback Collected</h3>
-                    <div class="metric-value">{stats['total_feedback']}</div>
+                    <div class="metric-value">{total_feedback}</div>
                     <div class="metric-status">{feedback_status}</div>
                 </div>
                 
                 <div class="metric-card rate">
                     <h3>Feedback Rate</h3>
-                    <div class="metric-value" style="color: {feedback_rate_color};">{stats['feedback_rate']}%</div>
+                    <div class="metric-value" style="color: {feedback_rate_color};">{feedback_rate}%</div>
                     <div class="metric-status">Target: 30%+</div>
                 </div>
                 
                 <div class="metric-card confidence">
                     <h3>Avg Confidence</h3>
-                    <div class="metric-value">{stats['average_confidence']:.2%}</div>
+                    <div class="metric-value">{average_confidence:.2%}</div>
                     <div class="metric-status">Model certainty</div>
                 </div>
             </div>
@@ -300,9 +314,9 @@ def get_admin_dashboard() -> str:
             <div class="status-section">
                 <h2>📊 System Status</h2>
                 
-                {"<div class='warning-box'>⚠️ Low feedback rate!  Current: " + str(stats['feedback_rate']) + "% (Target: 30%)</div>" if stats['feedback_rate'] < 30 and stats['total_predictions'] > 5 else ""}
+                {low_rate_warning}
                 
-                {"<div class='success-box'>✅ Ready for retraining!  Collected " + str(stats['total_feedback']) + " labeled samples</div>" if stats['total_feedback'] >= 20 else ""}
+                {retrain_notice}
                 
                 <table>
                     <tr>
@@ -312,27 +326,27 @@ def get_admin_dashboard() -> str:
                     </tr>
                     <tr>
                         <td>Total Predictions Made</td>
-                        <td>{stats['total_predictions']}</td>
+                        <td>{total_predictions}</td>
                         <td><span class="status-badge badge-active">✅ Active</span></td>
                     </tr>
                     <tr>
                         <td>Labeled Samples (for Retraining)</td>
-                        <td>{stats['total_feedback']}</td>
-                        <td><span class="status-badge {'badge-ready' if stats['total_feedback'] >= 20 else 'badge-pending'}">{'✅ Ready' if stats['total_feedback'] >= 20 else '⏳ Collecting'}</span></td>
+                        <td>{total_feedback}</td>
+                        <td><span class="status-badge {feedback_badge_class}">{feedback_badge}</span></td>
                     </tr>
                     <tr>
                         <td>Feedback Rate</td>
-                        <td>{stats['feedback_rate']}%</td>
-                        <td><span class="status-badge {'badge-ready' if stats['feedback_rate'] >= 20 else 'badge-pending'}">{'✅ Good' if stats['feedback_rate'] >= 20 else '⚠️ Needs Improvement'}</span></td>
+                        <td>{feedback_rate}%</td>
+                        <td><span class="status-badge {rate_badge_class}">{rate_badge}</span></td>
                     </tr>
                     <tr>
                         <td>Model Retraining Ready</td>
                         <td>{retrain_ready}</td>
-                        <td><span class="status-badge {'badge-ready' if stats['total_feedback'] >= 20 else 'badge-not-ready'}">{'🎉 Yes!' if stats['total_feedback'] >= 20 else '⏳ More data needed'}</span></td>
+                        <td><span class="status-badge {retrain_badge_class}">{retrain_badge}</span></td>
                     </tr>
                     <tr>
                         <td>Last Updated</td>
-                        <td>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</td>
+                        <td>{last_updated}</td>
                         <td><span class="status-badge badge-active">Live</span></td>
                     </tr>
                 </table>
@@ -345,30 +359,30 @@ def get_admin_dashboard() -> str:
                 <div class="progress-item">
                     <div class="progress-label">
                         <span>Data Collection Progress</span>
-                        <span>{stats['total_predictions']}/100 predictions</span>
+                        <span>{total_predictions}/100 predictions</span>
                     </div>
                     <div class="progress-bar">
-                        <div class="progress-fill" style="width: {min(stats['total_predictions']/100 * 100, 100)}%"></div>
+                        <div class="progress-fill" style="width: {predictions_progress}%"></div>
                     </div>
                 </div>
                 
                 <div class="progress-item">
                     <div class="progress-label">
                         <span>Feedback Collection Progress</span>
-                        <span>{stats['total_feedback']}/20 labeled samples</span>
+                        <span>{total_feedback}/20 labeled samples</span>
                     </div>
                     <div class="progress-bar">
-                        <div class="progress-fill" style="width: {min(stats['total_feedback']/20 * 100, 100)}%"></div>
+                        <div class="progress-fill" style="width: {feedback_progress}%"></div>
                     </div>
                 </div>
                 
                 <div class="progress-item">
                     <div class="progress-label">
                         <span>Feedback Rate Target</span>
-                        <span>{stats['feedback_rate']}/30%</span>
+                        <span>{feedback_rate}/30%</span>
                     </div>
                     <div class="progress-bar">
-                        <div class="progress-fill" style="width: {min(stats['feedback_rate']/30 * 100, 100)}%"></div>
+                        <div class="progress-fill" style="width: {rate_progress}%"></div>
                     </div>
                 </div>
             </div>
@@ -440,9 +454,81 @@ def get_admin_dashboard() -> str:
     </body>
     </html>
     """
+
+
+@lru_cache(maxsize=16)
+def _render_dashboard_body(stats_items: tuple, time_bucket: int) -> str:
+    """Render the stats-dependent part of the dashboard for one snapshot."""
+    stats = dict(stats_items)
+    total_predictions = stats['total_predictions']
+    total_feedback = stats['total_feedback']
+    feedback_rate = stats['feedback_rate']
+    enough_feedback = total_feedback >= 20
     
+    return DASHBOARD_BODY_TEMPLATE.format_map({
+        **stats,
+        # Determine status colors
+        "prediction_status": "✅ Active" if total_predictions > 0 else "⏳ Waiting",
+        "feedback_status": "✅ Collecting" if total_feedback > 0 else "⏳ Pending",
+        "feedback_rate_color": "#4caf50" if feedback_rate >= 20 else "#ff9800" if feedback_rate >= 10 else "#f44336",
+        "retrain_ready": "✅ Yes" if enough_feedback else "❌ Not Yet",
+        "low_rate_warning": (
+            "<div class='warning-box'>⚠️ Low feedback rate!  Current: " + str(feedback_rate) + "% (Target: 30%)</div>"
+            if feedback_rate < 30 and total_predictions > 5 else ""
+        ),
+        "retrain_notice": (
+            "<div class='success-box'>✅ Ready for retraining!  Collected " + str(total_feedback) + " labeled samples</div>"
+            if enough_feedback else ""
+        ),
+        "feedback_badge_class": 'badge-ready' if enough_feedback else 'badge-pending',
+        "feedback_badge": '✅ Ready' if enough_feedback else '⏳ Collecting',
+        "rate_badge_class": 'badge-ready' if feedback_rate >= 20 else 'badge-pending',
+        "rate_badge": '✅ Good' if feedback_rate >= 20 else '⚠️ Needs Improvement',
+        "retrain_badge_class": 'badge-ready' if enough_feedback else 'badge-not-ready',
+        "retrain_badge": '🎉 Yes!' if enough_feedback else '⏳ More data needed',
+        "last_updated": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "predictions_progress": min(total_predictions/100 * 100, 100),
+        "feedback_progress": min(total_feedback/20 * 100, 100),
+        "rate_progress": min(feedback_rate/30 * 100, 100),
+    })
+
+
+def dashboard_etag(stats: Dict) -> str:
+    """ETag for the page rendered from `stats` (quoted, as sent in headers)."""
+    return '"' + hashlib.md5(repr(sorted(stats.items())).encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header value matches `etag`.
+    The header is a comma-separated list of entity tags (or `*`); tags are
+    compared weakly, so a `W/` prefix is ignored on either side.
+    """
+    if not if_none_match:
+        return False
+    etag = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _dashboard_body(stats: Optional[Dict] = None) -> str:
+    """Render the dashboard body (loading current stats if none are given)."""
+    if stats is None:
+        stats = get_statistics()
+    time_bucket = int(time.time() // DASHBOARD_CACHE_SECONDS)
+    return _render_dashboard_body(tuple(sorted(stats.items())), time_bucket)
+
 
-    return html_content
+def get_admin_dashboard(stats: Optional[Dict] = None) -> str:
+    """Generate admin dashboard HTML (from `stats` if the caller already has them)."""
+    return DASHBOARD_HEAD + _dashboard_body(stats)
 
 
 # http://127.0.0.1:8000/admin/dashboard
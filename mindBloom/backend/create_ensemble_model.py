@@ -11,7 +11,10 @@ Base Models (with weights):
 - Logistic Regression: 0.25
 - Random Forest: 0.25  
 - XGBoost: 0.35 (highest weight)
-- SVM RBF: 0.15
+- SVM RBF: 0.15 (Nystroem RBF approximation + logistic regression)
+
+The base models are defined in ensemble_models.py (shared with the
+retrain scripts).
 
 Output: model.joblib (sklearn VotingClassifier)
 
@@ -26,20 +29,10 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
-from sklearn.ensemble import VotingClassifier, RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 
-# Try to import XGBoost
-try:
-    from xgboost import XGBClassifier
-    HAS_XGBOOST = True
-except ImportError:
-    print("Warning: XGBoost not installed. Using GradientBoosting instead.")
-    from sklearn.ensemble import GradientBoostingClassifier
-    HAS_XGBOOST = False
+from ensemble_models import create_ensemble
 
 print("=" * 80)
 print("CREATING ENSEMBLE VOTING CLASSIFIER")
@@ -103,64 +96,20 @@ elif LOCAL_DATASET.exists():
 else:
     raise FileNotFoundError("No training data found. Please ensure PPD_dataset_v2.csv exists or notebook outputs are available.")
 
+# One float32 block instead of mixed int64/bool/float64 columns: the tree
+# learners work in float32 anyway, so they skip a per-fit conversion. Kept
+# as DataFrames so the model still records feature_names_in_ for the backend.
+X_train = X_train.astype(np.float32)
+X_test = X_test.astype(np.float32)
+
 # ============================================================================
 # 2. Define Base Models (matching notebook Cell 76 specifications)
 # ============================================================================
 print("\n[2/5] Defining base models...")
 
-base_models = [
-    ("Logistic Regression", LogisticRegression(
-        multi_class="multinomial",
-        solver="lbfgs",
-        C=1.5,
-        max_iter=2000,
-        class_weight="balanced",
-        random_state=42
-    )),
-    ("Random Forest", RandomForestClassifier(
-        n_estimators=350,
-        max_depth=12,
-        min_samples_split=4,
-        min_samples_leaf=2,
-        max_features="sqrt",
-        class_weight="balanced",
-        n_jobs=-1,
-        random_state=42
-    )),
-]
-
-# Add XGBoost or fallback
-if HAS_XGBOOST:
-    base_models.append(("XGBoost", XGBClassifier(
-        n_estimators=350,
-        max_depth=5,
-        learning_rate=0.05,
-        subsample=0.9,
-        colsample_bytree=0.9,
-        objective="multi:softprob",
-        num_class=len(le.classes_),
-        eval_metric="mlogloss",
-        random_state=42
-    )))
-else:
-    base_models.append(("GradientBoosting", GradientBoostingClassifier(
-        n_estimators=350,
-        max_depth=5,
-        learning_rate=0.05,
-        subsample=0.9,
-        random_state=42
-    )))
-
-base_models.append(("SVM (RBF)", SVC(
-    kernel="rbf",
-    C=2.0,
-    gamma="scale",
-    class_weight="balanced",
-    probability=True,
-    random_state=42
-)))
-
-for name, _ in base_models:
+ensemble = create_ensemble(X_train, len(le.classes_))
+
+for name, _ in ensemble.estimators:
     print(f"  - {name}")
 
 # ============================================================================
@@ -169,15 +118,7 @@ for name, _ in base_models:
 print("\n[3/5] Creating VotingClassifier with weighted soft voting...")
 
 # Weights from notebook: LR=0.25, RF=0.25, XGB=0.35, SVM=0.15
-weights = [0.25, 0.25, 0.35, 0.15]
-print(f"  Weights: {dict(zip([n for n, _ in base_models], weights))}")
-
-ensemble = VotingClassifier(
-    estimators=base_models,
-    voting='soft',
-    weights=weights,
-    n_jobs=-1
-)
+print(f"  Weights: {dict(zip([n for n, _ in ensemble.estimators], ensemble.weights))}")
 
 # ============================================================================
 # 4. Train Ensemble
@@ -206,7 +147,8 @@ print(classification_report(y_test_enc, y_pred, target_names=le.classes_))
 print("\n[5/5] Saving ensemble model...")
 
 output_path = Path("model.joblib")
-joblib.dump(ensemble, output_path)
+# zlib level 3: ~4x smaller file for ~30 ms extra at backend startup
+joblib.dump(ensemble, output_path, compress=3)
 
 print(f"  Saved to: {output_path.absolute()}")
 print(f"  File size: {output_path.stat().st_size / 1024 / 1024:.2f} MB")
@@ -29,6 +29,11 @@ PREDICTIONS_LOG = DATA_DIR / "predictions_log.csv"
 NEW_TRAINING_DATA = DATA_DIR / "new_training_data.csv"
 FEEDBACK_LOG = DATA_DIR / "user_feedback.csv"
 
+# Parsed log CSVs, keyed by path -> ((mtime_ns, size), DataFrame). The
+# dashboard endpoints poll these files, so they are only re-parsed after a
+# write. Cached frames are shared and must not be modified by callers.
+_csv_cache: Dict[Path, Any] = {}
+
 # Column order matching the model's expected features
 FEATURE_COLUMNS = [
     "Age",
@@ -196,13 +201,26 @@ def get_data_stats() -> Dict[str, Any]:
     return stats
 
 
+def _read_log_csv(path: Path):
+    """Read a log CSV, reusing the parsed frame while the file is unchanged."""
+    import pandas as pd
+    
+    st = path.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _csv_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    df = pd.read_csv(path)
+    _csv_cache[path] = (key, df)
+    return df
+
+
 def get_statistics_from_csv() -> Dict[str, Any]:
     """
     Get comprehensive statistics from the CSV predictions log.
     Returns total predictions, risk distribution, and feedback rate.
     """
-    import pandas as pd
-    
     stats = {
         "total_predictions": 0,
         "total_feedback": 0,
@@ -218,7 +236,7 @@ def get_statistics_from_csv() -> Dict[str, Any]:
         return stats
     
     try:
-        df = pd.read_csv(PREDICTIONS_LOG)
+        df = _read_log_csv(PREDICTIONS_LOG)
         stats["total_predictions"] = len(df)
         
         # Count risk distribution
@@ -230,7 +248,7 @@ def get_statistics_from_csv() -> Dict[str, Any]:
         
         # Count feedback
         if FEEDBACK_LOG.exists():
-            feedback_df = pd.read_csv(FEEDBACK_LOG)
+            feedback_df = _read_log_csv(FEEDBACK_LOG)
             stats["total_feedback"] = len(feedback_df)
         
         # Calculate feedback rate
@@ -248,13 +266,11 @@ def get_recent_predictions(limit: int = 10) -> list:
     """
     Get the most recent predictions from CSV for display.
     """
-    import pandas as pd
-    
     if not PREDICTIONS_LOG.exists():
         return []
     
     try:
-        df = pd.read_csv(PREDICTIONS_LOG)
+        df = _read_log_csv(PREDICTIONS_LOG)
         # Get last N rows and convert to list of dicts
         recent = df.tail(limit).to_dict("records")
         return list(reversed(recent))  # Most recent first
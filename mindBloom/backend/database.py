@@ -5,204 +5,539 @@ Stores predictions, feedback, and learning metrics for model retraining.
 
 Tables:
 - predictions: All ML model predictions made for users
-- feedback: User feedback on prediction accuracy
+- feedback: User feedback on prediction accuracy (separate file, see below)
 - follow_up_schedules: Automated 6-week follow-up reminders
 - model_versions: Track model retraining history
+- meta: Key/value bookkeeping (admin seed checksum)
+- dashboard_stats: Single-row aggregate snapshot read by get_statistics()
+
+Feedback is kept in its own database file, ATTACHed as "fb" on every
+connection. SQLite serializes writes per file, so prediction writes and
+feedback writes no longer wait on each other.
+
+Connections: one shared writer connection guarded by a lock
+(writer_conn()) and a bounded pool of read-only connections
+(reader_conn()); WAL lets the readers run while a write is in flight.
 
 Usage:
     from database import init_db
     init_db()
 """
 
+import atexit
+import hashlib
+import hmac
+import os
+import queue
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Dict, List, Any
 import json
 
+# Try orjson (much faster encoder); fall back to stdlib json
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 DB_PATH = Path(__file__).parent / "mindbloom.db"
+FEEDBACK_DB_PATH = Path(__file__).parent / "mindbloom_feedback.db"
+
+# Input feature names in predictions-column order (missing keys -> NULL)
+PREDICTION_FEATURE_KEYS = (
+    "Age",
+    "Number of the latest pregnancy",
+    "Education Level",
+    "Husband's education level",
+    "Total children",
+    "Family type",
+    "Disease before pregnancy",
+    "Pregnancy length",
+    "Pregnancy plan",
+    "Regular checkups",
+    "Fear of pregnancy",
+    "Diseases during pregnancy",
+    "Feeling about motherhood",
+    "Recieved Support",
+    "Need for Support",
+    "Major changes or losses during pregnancy",
+    "Abuse",
+    "Trust and share feelings",
+    "Feeling for regular activities",
+    "Angry after latest child birth",
+    "Relationship with the in-laws",
+    "Relationship with husband",
+    "Relationship with the newborn",
+    "Relationship between father and newborn",
+    "Age of immediate older children",
+    "Birth compliancy",
+    "Breastfeed",
+    "Worry about newborn",
+    "Relax/sleep when newborn is tended",
+    "Relax/sleep when the newborn is asleep",
+    "Depression before pregnancy (PHQ2)",
+    "Depression during pregnancy (PHQ2)",
+    "Newborn illness",
+)
+
+# Full schema, run with a single executescript() call from init_db
+_SCHEMA_SQL = """
+BEGIN IMMEDIATE;
+
+-- Table 0: Users (authentication)
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE,
+    password_hash TEXT NOT NULL,
+    password_salt BLOB,
+    role TEXT DEFAULT 'user',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_login DATETIME,
+    is_active INTEGER DEFAULT 1
+);
+
+-- Table 1: Predictions (all predictions made by users)
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT UNIQUE NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    user_email TEXT,
+    user_phone TEXT,
+    
+    -- Input features (all 33 model features)
+    age INTEGER,
+    number_of_pregnancies INTEGER,
+    education_level TEXT,
+    husbands_education TEXT,
+    total_children TEXT,
+    family_type TEXT,
+    disease_before_pregnancy TEXT,
+    pregnancy_length TEXT,
+    pregnancy_plan TEXT,
+    regular_checkups TEXT,
+    fear_of_pregnancy TEXT,
+    diseases_during_pregnancy TEXT,
+    feeling_about_motherhood TEXT,
+    received_support TEXT,
+    need_for_support TEXT,
+    major_changes_losses TEXT,
+    abuse TEXT,
+    trust_share_feelings TEXT,
+    feeling_regular_activities TEXT,
+    angry_after_birth TEXT,
+    relationship_inlaws TEXT,
+    relationship_husband TEXT,
+    relationship_newborn TEXT,
+    relationship_father_newborn TEXT,
+    age_older_children TEXT,
+    birth_compliancy TEXT,
+    breastfeed TEXT,
+    worry_newborn TEXT,
+    relax_sleep_tended TEXT,
+    relax_sleep_asleep TEXT,
+    depression_before_pregnancy INTEGER DEFAULT 0,
+    depression_during_pregnancy INTEGER DEFAULT 0,
+    newborn_illness TEXT,
+    
+    -- Prediction output
+    predicted_label TEXT,
+    predicted_probabilities JSON,
+    confidence REAL,
+    
+    -- Status tracking
+    follow_up_status TEXT DEFAULT 'pending',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table 2: Feedback (actual outcomes collected from users), in the attached
+-- feedback database. SQLite can't enforce a foreign key across database
+-- files; session_id still refers to predictions(session_id).
+CREATE TABLE IF NOT EXISTS fb.feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT UNIQUE NOT NULL,
+    actual_outcome TEXT,
+    feedback_date DATETIME,
+    feedback_notes TEXT,
+    clinician_validated INTEGER DEFAULT 0,
+    confidence_score REAL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table 3: Follow-up Schedule
+CREATE TABLE IF NOT EXISTS follow_up_schedules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    scheduled_date DATETIME,
+    reminder_sent INTEGER DEFAULT 0,
+    follow_up_completed INTEGER DEFAULT 0,
+    follow_up_method TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES predictions(session_id)
+);
+
+-- Table 4: Model Versions
+CREATE TABLE IF NOT EXISTS model_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    version_number INTEGER,
+    model_path TEXT,
+    training_samples INTEGER,
+    accuracy REAL,
+    training_date DATETIME,
+    data_sources TEXT,
+    notes TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Small key/value store for init bookkeeping (e.g. admin seed checksum)
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Precomputed dashboard aggregates (one row, id = 1), rewritten by
+-- refresh_dashboard_stats() so get_statistics() doesn't scan predictions
+CREATE TABLE IF NOT EXISTS dashboard_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_predictions INTEGER,
+    total_feedback INTEGER,
+    feedback_rate REAL,
+    avg_confidence REAL,
+    updated_at REAL
+);
+
+-- Due follow-ups: equality column first, then the date range.
+-- (The feedback JOIN on session_id and the login lookup on username are
+-- already served by the UNIQUE autoindexes.)
+CREATE INDEX IF NOT EXISTS idx_followup_due
+ON follow_up_schedules(follow_up_completed, scheduled_date);
+
+COMMIT;
+"""
 
+# Hot-path statements kept as module constants: the sqlite3 module caches
+# prepared statements per connection keyed by SQL text, so reusing the same
+# string on the long-lived pooled connections skips re-parsing on every call.
+_INSERT_PREDICTION_SQL = """
+INSERT INTO predictions (
+    session_id, user_email, user_phone,
+    age, number_of_pregnancies, education_level, husbands_education,
+    total_children, family_type, disease_before_pregnancy, pregnancy_length,
+    pregnancy_plan, regular_checkups, fear_of_pregnancy, diseases_during_pregnancy,
+    feeling_about_motherhood, received_support, need_for_support,
+    major_changes_losses, abuse, trust_share_feelings, feeling_regular_activities,
+    angry_after_birth, relationship_inlaws, relationship_husband,
+    relationship_newborn, relationship_father_newborn, age_older_children,
+    birth_compliancy, breastfeed, worry_newborn, relax_sleep_tended,
+    relax_sleep_asleep, depression_before_pregnancy, depression_during_pregnancy,
+    newborn_illness, predicted_label, predicted_probabilities, confidence
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_FEEDBACK_SQL = """
+INSERT INTO fb.feedback (session_id, actual_outcome, feedback_date, feedback_notes, clinician_validated, confidence_score)
+VALUES (?, ?, datetime('now'), ?, ?, ?)
+"""
+
+# Single probe on the username index; the hash is compared in Python
+_USER_CREDENTIALS_SQL = """
+SELECT id, username, email, role, is_active, password_hash, password_salt
+FROM users WHERE username = ?
+"""
+
+_PREDICTIONS_WITH_FEEDBACK_SQL = """
+SELECT p.*, f.actual_outcome, f.feedback_notes, f.clinician_validated
+FROM predictions p
+INNER JOIN fb.feedback f ON p.session_id = f.session_id
+WHERE f.actual_outcome IS NOT NULL
+"""
 
-def get_connection():
-    """Get SQLite connection."""
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
+_UPDATE_LAST_LOGIN_SQL = "UPDATE users SET last_login = datetime('now') WHERE id = ?"
+
+_SET_PASSWORD_SQL = "UPDATE users SET password_hash = ?, password_salt = ? WHERE id = ?"
+
+# Hardcoded admin credentials (seeded by seed_admin_users)
+ADMIN_ACCOUNTS = [
+    {"username": "admin1", "password": "abrar6677"},
+    {"username": "admin2", "password": "fatema123"},
+    {"username": "admin3", "password": "salma123"},
+    {"username": "admin4", "password": "ismum123"},
+]
+
+# PBKDF2-HMAC-SHA256 work factor for stored password hashes
+PBKDF2_ITERATIONS = 100_000
+
+# Journal mode is persistent in the database file, so WAL only needs to be
+# switched on once per path per process.
+_WAL_ENABLED = set()
+
+
+def _apply_pragmas(conn: sqlite3.Connection, read_only: bool = False):
+    """Apply WAL journal mode and per-connection tuning PRAGMAs."""
+    for schema, path in (("main", DB_PATH), ("fb", FEEDBACK_DB_PATH)):
+        db_key = str(path)
+        if not read_only and db_key not in _WAL_ENABLED:
+            mode = conn.execute(f"PRAGMA {schema}.journal_mode").fetchone()[0]
+            if mode.lower() != "wal":
+                conn.execute(f"PRAGMA {schema}.journal_mode=WAL")
+            _WAL_ENABLED.add(db_key)
+        
+        # synchronous/mmap/cache are per-connection, per-schema settings
+        conn.execute(f"PRAGMA {schema}.synchronous=NORMAL")
+        conn.execute(f"PRAGMA {schema}.mmap_size=268435456")  # 256 MB
+        conn.execute(f"PRAGMA {schema}.cache_size=-65536")    # 64 MB
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # Let the WAL grow to ~2000 pages before auto-checkpointing during write
+    # bursts; the maintenance thread truncates it periodically
+    conn.execute("PRAGMA wal_autocheckpoint=2000")
+
+
+def get_connection(read_only: bool = False):
+    """
+    Open a new SQLite connection (WAL mode, synchronous=NORMAL) with the
+    feedback database attached. Use writer_conn()/reader_conn() instead of
+    calling this directly; they reuse pooled connections.
+    """
+    if read_only:
+        conn = sqlite3.connect(
+            f"{DB_PATH.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.execute("ATTACH DATABASE ? AS fb", (f"{FEEDBACK_DB_PATH.resolve().as_uri()}?mode=ro",))
+        conn.row_factory = sqlite3.Row
+    else:
+        conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+        conn.execute("ATTACH DATABASE ? AS fb", (str(FEEDBACK_DB_PATH),))
+    _apply_pragmas(conn, read_only)
     return conn
 
 
+# Single writer (SQLite allows one writer per file anyway) + bounded readers
+READER_POOL_SIZE = 8
+_writer: Optional[sqlite3.Connection] = None
+_writer_lock = threading.Lock()
+_reader_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=READER_POOL_SIZE)
+_readers_opened = 0
+_readers_lock = threading.Lock()
+
+
+@contextmanager
+def writer_conn(row_factory=None):
+    """
+    Exclusive use of the shared writer connection.
+    Rolls back anything uncommitted if the block raises.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = get_connection()
+        _writer.row_factory = row_factory
+        try:
+            yield _writer
+        except BaseException:
+            if _writer.in_transaction:
+                _writer.rollback()
+            raise
+
+
+@contextmanager
+def reader_conn():
+    """Borrow a read-only connection (sqlite3.Row rows) from the pool."""
+    global _readers_opened
+    try:
+        conn = _reader_pool.get_nowait()
+    except queue.Empty:
+        with _readers_lock:
+            can_open = _readers_opened < READER_POOL_SIZE
+            if can_open:
+                _readers_opened += 1
+        if can_open:
+            try:
+                conn = get_connection(read_only=True)
+            except Exception:
+                with _readers_lock:
+                    _readers_opened -= 1
+                raise
+        else:
+            conn = _reader_pool.get()  # pool exhausted: wait for a reader
+    try:
+        yield conn
+    finally:
+        _reader_pool.put(conn)
+
+
+def close_connections():
+    """Close the writer and all pooled readers (registered with atexit)."""
+    global _writer, _readers_opened
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+    with _readers_lock:
+        while True:
+            try:
+                _reader_pool.get_nowait().close()
+            except queue.Empty:
+                break
+        _readers_opened = 0
+
+
+atexit.register(close_connections)
+
+
+# Background WAL checkpoint / PRAGMA optimize
+MAINTENANCE_INTERVAL_SECONDS = 15 * 60
+_maintenance_thread: Optional[threading.Thread] = None
+_maintenance_stop = threading.Event()
+
+
+def _maintenance_loop():
+    """Checkpoint (and truncate) the WAL files and refresh planner stats."""
+    while not _maintenance_stop.wait(MAINTENANCE_INTERVAL_SECONDS):
+        try:
+            with writer_conn() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # all attached databases
+                conn.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            print(f"[WARN] Database maintenance failed: {e}")
+
+
+def start_maintenance():
+    """Start the background checkpoint thread (once per process)."""
+    global _maintenance_thread
+    if _maintenance_thread is not None and _maintenance_thread.is_alive():
+        return
+    _maintenance_stop.clear()
+    _maintenance_thread = threading.Thread(
+        target=_maintenance_loop, name="db-maintenance", daemon=True
+    )
+    _maintenance_thread.start()
+
+
+def stop_maintenance():
+    """Stop the background checkpoint thread."""
+    _maintenance_stop.set()
+
+
+atexit.register(stop_maintenance)
+
+
+def _table_columns(cursor: sqlite3.Cursor, table: str) -> set:
+    """Column names of a table, including generated columns."""
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
 def init_db():
     """Initialize database schema."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Table 0: Users (authentication)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        email TEXT UNIQUE,
-        password_hash TEXT NOT NULL,
-        role TEXT DEFAULT 'user',
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        last_login DATETIME,
-        is_active INTEGER DEFAULT 1
-    )
-    """)
-    
-    # Add role column if it doesn't exist (for existing databases)
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'user'")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    
-    # Table 1: Predictions (all predictions made by users)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS predictions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id TEXT UNIQUE NOT NULL,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        user_email TEXT,
-        user_phone TEXT,
+    with writer_conn() as conn:
+        cursor = conn.cursor()
         
-        -- Input features (all 33 model features)
-        age INTEGER,
-        number_of_pregnancies INTEGER,
-        education_level TEXT,
-        husbands_education TEXT,
-        total_children TEXT,
-        family_type TEXT,
-        disease_before_pregnancy TEXT,
-        pregnancy_length TEXT,
-        pregnancy_plan TEXT,
-        regular_checkups TEXT,
-        fear_of_pregnancy TEXT,
-        diseases_during_pregnancy TEXT,
-        feeling_about_motherhood TEXT,
-        received_support TEXT,
-        need_for_support TEXT,
-        major_changes_losses TEXT,
-        abuse TEXT,
-        trust_share_feelings TEXT,
-        feeling_regular_activities TEXT,
-        angry_after_birth TEXT,
-        relationship_inlaws TEXT,
-        relationship_husband TEXT,
-        relationship_newborn TEXT,
-        relationship_father_newborn TEXT,
-        age_older_children TEXT,
-        birth_compliancy TEXT,
-        breastfeed TEXT,
-        worry_newborn TEXT,
-        relax_sleep_tended TEXT,
-        relax_sleep_asleep TEXT,
-        depression_before_pregnancy INTEGER DEFAULT 0,
-        depression_during_pregnancy INTEGER DEFAULT 0,
-        newborn_illness TEXT,
+        # All CREATE TABLE / CREATE INDEX statements in one batch
+        conn.executescript(_SCHEMA_SQL)
         
-        -- Prediction output
-        predicted_label TEXT,
-        predicted_probabilities JSON,
-        confidence REAL,
+        # Add columns missing from older databases (checked up front rather than
+        # letting ALTER TABLE fail on every startup)
+        user_columns = _table_columns(cursor, "users")
+        if "role" not in user_columns:
+            cursor.execute("ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'user'")
+        if "password_salt" not in user_columns:
+            # NULL salt = legacy unsalted SHA-256 hash
+            cursor.execute("ALTER TABLE users ADD COLUMN password_salt BLOB")
         
-        -- Status tracking
-        follow_up_status TEXT DEFAULT 'pending',
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    # Table 2: Feedback (actual outcomes collected from users)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS feedback (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id TEXT UNIQUE NOT NULL,
-        actual_outcome TEXT,
-        feedback_date DATETIME,
-        feedback_notes TEXT,
-        clinician_validated INTEGER DEFAULT 0,
-        confidence_score REAL,
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (session_id) REFERENCES predictions(session_id)
-    )
-    """)
-    
-    # Table 3: Follow-up Schedule
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS follow_up_schedules (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id TEXT NOT NULL,
-        scheduled_date DATETIME,
-        reminder_sent INTEGER DEFAULT 0,
-        follow_up_completed INTEGER DEFAULT 0,
-        follow_up_method TEXT,
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (session_id) REFERENCES predictions(session_id)
-    )
-    """)
-    
-    # Table 4: Model Versions
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS model_versions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        version_number INTEGER,
-        model_path TEXT,
-        training_samples INTEGER,
-        accuracy REAL,
-        training_date DATETIME,
-        data_sources TEXT,
-        notes TEXT,
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
+        # Expose the high-risk probability from the JSON column as a virtual
+        # generated column so analytics can filter/aggregate on it through an
+        # index instead of parsing JSON in Python (needs SQLite 3.38+ for ->>)
+        if sqlite3.sqlite_version_info >= (3, 38, 0):
+            if "prob_high" not in _table_columns(cursor, "predictions"):
+                cursor.execute("""
+                ALTER TABLE predictions ADD COLUMN prob_high REAL
+                GENERATED ALWAYS AS (predicted_probabilities ->> '$.high') VIRTUAL
+                """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_prob_high ON predictions(prob_high)")
+        
+        # Move feedback out of the main database if an older version put it there
+        cursor.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'feedback'")
+        if cursor.fetchone():
+            cursor.execute("""
+            INSERT OR IGNORE INTO fb.feedback (
+                session_id, actual_outcome, feedback_date, feedback_notes,
+                clinician_validated, confidence_score, created_at
+            )
+            SELECT session_id, actual_outcome, feedback_date, feedback_notes,
+                   clinician_validated, confidence_score, created_at
+            FROM main.feedback
+            """)
+            conn.commit()
+            cursor.execute("DROP TABLE main.feedback")
+        
+        conn.commit()
+        
+        cursor.execute("SELECT value FROM meta WHERE key = 'admin_seed_hash'")
+        row = cursor.fetchone()
+        admins_seeded = row is not None and row[0] == _admin_seed_hash()
     
-    conn.commit()
-    conn.close()
+    # Seed hardcoded admin accounts (skipped on warm starts when unchanged;
+    # /auth/fix-admin-roles still forces a re-seed)
+    if not admins_seeded:
+        seed_admin_users()
     
-    # Seed hardcoded admin accounts
-    seed_admin_users()
+    # Keep WAL files bounded
+    start_maintenance()
     
     print("[OK] Database initialized successfully!")
 
 
+def _admin_seed_hash() -> str:
+    """Checksum of ADMIN_ACCOUNTS, stored in meta once the seed is applied."""
+    return hashlib.sha256(json.dumps(ADMIN_ACCOUNTS, sort_keys=True).encode()).hexdigest()
+
+
 def seed_admin_users():
     """Seed hardcoded admin accounts for the application."""
-    import hashlib
-    
-    # Hardcoded admin credentials
-    ADMIN_ACCOUNTS = [
-        {"username": "admin1", "password": "abrar6677"},
-        {"username": "admin2", "password": "fatema123"},
-        {"username": "admin3", "password": "salma123"},
-        {"username": "admin4", "password": "ismum123"},
-    ]
-    
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    for admin in ADMIN_ACCOUNTS:
-        password_hash = hashlib.sha256(admin["password"].encode()).hexdigest()
-        
-        # Check if admin already exists
-        cursor.execute("SELECT id FROM users WHERE username = ?", (admin["username"],))
-        existing = cursor.fetchone()
+    # One explicit transaction for the whole loop: a single write lock and
+    # a single fsync instead of one per account
+    with writer_conn() as conn, conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        for admin in ADMIN_ACCOUNTS:
+            password_hash, salt = _new_password_hash(admin["password"])
+            
+            # Check if admin already exists
+            cursor.execute("SELECT id FROM users WHERE username = ?", (admin["username"],))
+            existing = cursor.fetchone()
+            
+            if existing:
+                # Update existing admin to ensure role is 'admin'
+                cursor.execute("""
+                UPDATE users SET role = 'admin', password_hash = ?, password_salt = ? WHERE username = ?
+                """, (password_hash, salt, admin["username"]))
+            else:
+                # Create new admin
+                cursor.execute("""
+                INSERT INTO users (username, password_hash, password_salt, role)
+                VALUES (?, ?, ?, 'admin')
+                """, (admin["username"], password_hash, salt))
         
-        if existing:
-            # Update existing admin to ensure role is 'admin'
-            cursor.execute("""
-            UPDATE users SET role = 'admin', password_hash = ? WHERE username = ?
-            """, (password_hash, admin["username"]))
-        else:
-            # Create new admin
-            cursor.execute("""
-            INSERT INTO users (username, password_hash, role)
-            VALUES (?, ?, 'admin')
-            """, (admin["username"], password_hash))
+        cursor.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('admin_seed_hash', ?)",
+            (_admin_seed_hash(),)
+        )
     
-    conn.commit()
-    conn.close()
     print("[OK] Admin accounts seeded")
 
 
-def save_prediction(
+def _json_dumps(obj: Any) -> str:
+    """Serialize to JSON text (stored as TEXT so SQLite's JSON functions can read it)."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def build_prediction_row(
     session_id: str,
     user_email: Optional[str],
     user_phone: Optional[str],
@@ -210,74 +545,47 @@ def save_prediction(
     predicted_label: str,
     probabilities: Dict[str, float],
     confidence: float
-) -> bool:
-    """Save a prediction to database."""
+) -> tuple:
+    """Build the parameter tuple for one predictions row (for save_predictions_bulk)."""
+    return (
+        session_id, user_email, user_phone,
+        *map(input_features.get, PREDICTION_FEATURE_KEYS),
+        predicted_label,
+        _json_dumps(probabilities),
+        confidence
+    )
+
+
+def save_predictions_bulk(rows: List[tuple]) -> bool:
+    """
+    Save many prediction rows (from build_prediction_row) in one transaction.
+    Callers collecting a burst of predictions should flush in chunks of ~500.
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        INSERT INTO predictions (
-            session_id, user_email, user_phone,
-            age, number_of_pregnancies, education_level, husbands_education,
-            total_children, family_type, disease_before_pregnancy, pregnancy_length,
-            pregnancy_plan, regular_checkups, fear_of_pregnancy, diseases_during_pregnancy,
-            feeling_about_motherhood, received_support, need_for_support,
-            major_changes_losses, abuse, trust_share_feelings, feeling_regular_activities,
-            angry_after_birth, relationship_inlaws, relationship_husband,
-            relationship_newborn, relationship_father_newborn, age_older_children,
-            birth_compliancy, breastfeed, worry_newborn, relax_sleep_tended,
-            relax_sleep_asleep, depression_before_pregnancy, depression_during_pregnancy,
-            newborn_illness, predicted_label, predicted_probabilities, confidence
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            session_id, user_email, user_phone,
-            input_features.get("Age"),
-            input_features.get("Number of the latest pregnancy"),
-            input_features. get("Education Level"),
-            input_features.get("Husband's education level"),
-            input_features.get("Total children"),
-            input_features.get("Family type"),
-            input_features.get("Disease before pregnancy"),
-            input_features.get("Pregnancy length"),
-            input_features.get("Pregnancy plan"),
-            input_features.get("Regular checkups"),
-            input_features.get("Fear of pregnancy"),
-            input_features.get("Diseases during pregnancy"),
-            input_features. get("Feeling about motherhood"),
-            input_features.get("Recieved Support"),
-            input_features.get("Need for Support"),
-            input_features.get("Major changes or losses during pregnancy"),
-            input_features. get("Abuse"),
-            input_features.get("Trust and share feelings"),
-            input_features.get("Feeling for regular activities"),
-            input_features.get("Angry after latest child birth"),
-            input_features.get("Relationship with the in-laws"),
-            input_features.get("Relationship with husband"),
-            input_features.get("Relationship with the newborn"),
-            input_features.get("Relationship between father and newborn"),
-            input_features.get("Age of immediate older children"),
-            input_features. get("Birth compliancy"),
-            input_features.get("Breastfeed"),
-            input_features.get("Worry about newborn"),
-            input_features.get("Relax/sleep when newborn is tended"),
-            input_features. get("Relax/sleep when the newborn is asleep"),
-            input_features.get("Depression before pregnancy (PHQ2)"),
-            input_features. get("Depression during pregnancy (PHQ2)"),
-            input_features.get("Newborn illness"),
-            predicted_label,
-            json.dumps(probabilities),
-            confidence
-        ))
-        
-        conn.commit()
-        conn.close()
+        with writer_conn() as conn, conn:
+            conn.executemany(_INSERT_PREDICTION_SQL, rows)
         return True
     except Exception as e:
-        print(f"❌ Error saving prediction:  {e}")
+        print(f"❌ Error saving predictions:  {e}")
         return False
 
 
+def save_prediction(
+    session_id: str,
+    user_email: Optional[str],
+    user_phone: Optional[str],
+    input_features: Dict[str, Any],
+    predicted_label: str,
+    probabilities: Dict[str, float],
+    confidence: float
+) -> bool:
+    """Save a prediction to database."""
+    return save_predictions_bulk([build_prediction_row(
+        session_id, user_email, user_phone, input_features,
+        predicted_label, probabilities, confidence
+    )])
+
+
 def save_feedback(
     session_id: str,
     actual_outcome: str,
@@ -287,23 +595,18 @@ def save_feedback(
 ) -> bool:
     """Save user feedback (actual outcome) for retraining."""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        INSERT INTO feedback (session_id, actual_outcome, feedback_date, feedback_notes, clinician_validated, confidence_score)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            session_id,
-            actual_outcome,
-            datetime.now().isoformat(),
-            feedback_notes,
-            1 if clinician_validated else 0,
-            confidence_score
-        ))
-        
-        conn. commit()
-        conn.close()
+        with writer_conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(_INSERT_FEEDBACK_SQL, (
+                session_id,
+                actual_outcome,
+                feedback_notes,
+                1 if clinician_validated else 0,
+                confidence_score
+            ))
+            
+            conn.commit()
         return True
     except Exception as e:
         print(f"❌ Error saving feedback:  {e}")
@@ -317,17 +620,16 @@ def schedule_follow_up(
 ) -> bool:
     """Schedule follow-up reminder for collecting feedback."""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        scheduled_date = datetime.now() + timedelta(days=days_from_now)
-        
-        cursor.execute("""
-        INSERT INTO follow_up_schedules (session_id, scheduled_date, follow_up_method)
-        VALUES (?, ?, ?)
-        """, (session_id, scheduled_date.isoformat(), method))
-        
-        conn.commit()
-        conn.close()
+        with writer_conn() as conn:
+            cursor = conn.cursor()
+            
+            # Same UTC 'YYYY-MM-DD HH:MM:SS' format get_pending_follow_ups compares against
+            cursor.execute("""
+            INSERT INTO follow_up_schedules (session_id, scheduled_date, follow_up_method)
+            VALUES (?, datetime('now', ?), ?)
+            """, (session_id, f"+{int(days_from_now)} days", method))
+            
+            conn.commit()
         return True
     except Exception as e: 
         print(f"❌ Error scheduling follow-up: {e}")
@@ -336,79 +638,131 @@ def schedule_follow_up(
 
 def get_predictions_with_feedback() -> List[Dict]:
     """Get all predictions that have feedback (for retraining)."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    SELECT p.*, f.actual_outcome, f.feedback_notes, f.clinician_validated
-    FROM predictions p
-    INNER JOIN feedback f ON p.session_id = f.session_id
-    WHERE f.actual_outcome IS NOT NULL
-    """)
-    
-    rows = cursor.fetchall()
-    conn.close()
+    with reader_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(_PREDICTIONS_WITH_FEEDBACK_SQL)
+        
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
 
 def get_pending_follow_ups() -> List[Dict]:
     """Get follow-ups that are due."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    SELECT * FROM follow_up_schedules
-    WHERE scheduled_date <= datetime('now')
-    AND follow_up_completed = 0
-    """)
-    
-    rows = cursor.fetchall()
-    conn.close()
+    with reader_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+        SELECT * FROM follow_up_schedules
+        WHERE scheduled_date <= datetime('now')
+        AND follow_up_completed = 0
+        """)
+        
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
 
-def export_for_retraining(output_path: str = "retraining_data.csv") -> bool:
-    """Export labeled data as CSV for model retraining."""
+_pd = None
+
+
+def _get_pd():
+    """Import pandas on first use only (it is only needed for CSV export)."""
+    global _pd
+    if _pd is None:
+        import pandas
+        _pd = pandas
+    return _pd
+
+
+def export_for_retraining(output_path: str = "retraining_data.csv", chunksize: int = 5000) -> bool:
+    """
+    Export labeled data as CSV for model retraining.
+    Rows are streamed from SQLite into the CSV in chunks, so memory stays
+    bounded by `chunksize` rather than the number of labeled samples.
+    """
     try:
-        import pandas as pd
+        pd = _get_pd()
+        
+        total = 0
+        with reader_conn() as conn:
+            for chunk in pd.read_sql_query(_PREDICTIONS_WITH_FEEDBACK_SQL, conn, chunksize=chunksize):
+                if chunk.empty:
+                    continue
+                chunk.to_csv(output_path, index=False, header=(total == 0), mode="w" if total == 0 else "a")
+                total += len(chunk)
         
-        data = get_predictions_with_feedback()
-        if not data:
+        if total == 0:
             print("⚠️  No labeled data available for retraining")
             return False
         
-        df = pd.DataFrame(data)
-        df.to_csv(output_path, index=False)
-        print(f"[OK] Exported {len(df)} labeled samples to {output_path}")
+        print(f"[OK] Exported {total} labeled samples to {output_path}")
         return True
     except Exception as e:
         print(f"[ERROR] Error exporting data: {e}")
         return False
 
 
-def get_statistics() -> Dict:
-    """Get data collection statistics."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) as total FROM predictions")
-    total_predictions = cursor.fetchone()['total']
+# The scheduler refreshes dashboard_stats on this interval; a snapshot older
+# than DASHBOARD_STATS_MAX_AGE (e.g. no scheduler running) is recomputed inline
+DASHBOARD_STATS_INTERVAL_SECONDS = 30
+DASHBOARD_STATS_MAX_AGE = 2 * DASHBOARD_STATS_INTERVAL_SECONDS
+
+
+def refresh_dashboard_stats() -> Dict:
+    """Recompute the aggregate statistics and store them in dashboard_stats."""
+    with reader_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM predictions) AS total_pred,
+            (SELECT COUNT(*) FROM fb.feedback) AS total_fb,
+            (SELECT AVG(confidence) FROM predictions) AS avg_conf
+        """)
+        row = cursor.fetchone()
+    total_predictions = row['total_pred']
+    total_feedback = row['total_fb']
+    avg_confidence = row['avg_conf'] or 0
     
-    cursor. execute("SELECT COUNT(*) as total FROM feedback")
-    total_feedback = cursor.fetchone()['total']
+    feedback_rate = (total_feedback / total_predictions * 100) if total_predictions > 0 else 0
     
-    cursor.execute("SELECT AVG(confidence) as avg_conf FROM predictions")
-    avg_confidence = cursor.fetchone()['avg_conf'] or 0
+    stats = {
+        "total_predictions": total_predictions,
+        "total_feedback": total_feedback,
+        # float() so an empty database gives 0.0 here too, matching the REAL
+        # columns get_statistics() reads back (the dashboard ETag hashes these)
+        "feedback_rate": float(round(feedback_rate, 2)),
+        "average_confidence": float(round(avg_confidence, 4))
+    }
     
-    conn. close()
+    with writer_conn() as conn, conn:
+        conn.execute("""
+        INSERT OR REPLACE INTO dashboard_stats
+            (id, total_predictions, total_feedback, feedback_rate, avg_confidence, updated_at)
+        VALUES (1, ?, ?, ?, ?, ?)
+        """, (
+            stats["total_predictions"], stats["total_feedback"],
+            stats["feedback_rate"], stats["average_confidence"], time.time()
+        ))
+    return stats
+
+
+def get_statistics() -> Dict:
+    """Get data collection statistics (from the dashboard_stats snapshot)."""
+    with reader_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM dashboard_stats WHERE id = 1")
+        row = cursor.fetchone()
     
-    feedback_rate = (total_feedback / total_predictions * 100) if total_predictions > 0 else 0
+    if row is None or time.time() - row['updated_at'] > DASHBOARD_STATS_MAX_AGE:
+        return refresh_dashboard_stats()
     
     return {
-        "total_predictions": total_predictions,
-        "total_feedback": total_feedback,
-        "feedback_rate": round(feedback_rate, 2),
-        "average_confidence": round(avg_confidence, 4)
+        "total_predictions": row['total_predictions'],
+        "total_feedback": row['total_feedback'],
+        "feedback_rate": row['feedback_rate'],
+        "average_confidence": row['avg_confidence']
     }
 
 
@@ -417,33 +771,67 @@ def get_statistics() -> Dict:
 # USER AUTHENTICATION FUNCTIONS
 # ============================================================================
 
+def _hash_password(password: str, salt: bytes) -> sqlite3.Binary:
+    """Raw PBKDF2-HMAC-SHA256 digest, bound as a BLOB (no hex round-trip)."""
+    return sqlite3.Binary(hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS))
+
+
+def _new_password_hash(password: str):
+    """Hash a password with a fresh random salt. Returns (hash, salt)."""
+    salt = sqlite3.Binary(os.urandom(16))
+    return _hash_password(password, salt), salt
+
+
+def _find_user_by_credentials(cursor: sqlite3.Cursor, username: str, password: str):
+    """
+    Look up a user row by username/password.
+    Returns (user, is_legacy_hash); user is None if they don't match.
+    Callers re-hash legacy unsalted SHA-256 accounts with PBKDF2.
+    """
+    cursor.execute(_USER_CREDENTIALS_SQL, (username,))
+    user = cursor.fetchone()
+    if user is None:
+        return None, False
+    
+    salt = user['password_salt']
+    if salt is None:
+        password_hash = hashlib.sha256(password.encode()).hexdigest()
+    else:
+        password_hash = _hash_password(password, salt)
+    
+    # Constant-time comparison
+    if not hmac.compare_digest(user['password_hash'], password_hash):
+        return None, False
+    return user, salt is None
+
+
 def create_user(username: str, password: str, email: Optional[str] = None) -> Dict:
     """
     Create a new user account.
     Returns dict with success status and user_id or error message.
     """
-    import hashlib
-    
-    # Hash the password with SHA-256
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
+    # Salted PBKDF2 hash
+    password_hash, salt = _new_password_hash(password)
     
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        INSERT INTO users (username, email, password_hash)
-        VALUES (?, ?, ?)
-        """, (username, email, password_hash))
-        
-        user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with writer_conn(sqlite3.Row) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+            INSERT INTO users (username, email, password_hash, password_salt)
+            VALUES (?, ?, ?, ?)
+            RETURNING id, created_at
+            """, (username, email, password_hash, salt))
+            
+            # Row comes back from the INSERT itself (SQLite 3.35+)
+            user = cursor.fetchone()
+            conn.commit()
         
         return {
             "success": True,
-            "user_id": user_id,
+            "user_id": user['id'],
             "username": username,
+            "created_at": user['created_at'],
             "message": "Account created successfully"
         }
     except sqlite3.IntegrityError as e:
@@ -462,28 +850,18 @@ def verify_user(username: str, password: str) -> Dict:
     Verify user credentials for login.
     Returns dict with success status and user info or error message.
     """
-    import hashlib
-    
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT id, username, email, role, is_active FROM users 
-        WHERE username = ? AND password_hash = ?
-        """, (username, password_hash))
-        
-        user = cursor.fetchone()
+        with reader_conn() as conn:
+            user, legacy_hash = _find_user_by_credentials(conn.cursor(), username, password)
         
         if user:
-            # Update last login time
-            cursor.execute("""
-            UPDATE users SET last_login = ? WHERE id = ?
-            """, (datetime.now().isoformat(), user['id']))
-            conn.commit()
-            conn.close()
+            with writer_conn() as conn:
+                cursor = conn.cursor()
+                if legacy_hash:
+                    cursor.execute(_SET_PASSWORD_SQL, (*_new_password_hash(password), user['id']))
+                # Update last login time
+                cursor.execute(_UPDATE_LAST_LOGIN_SQL, (user['id'],))
+                conn.commit()
             
             return {
                 "success": True,
@@ -494,7 +872,6 @@ def verify_user(username: str, password: str) -> Dict:
                 "message": "Login successful"
             }
         else:
-            conn.close()
             return {"success": False, "error": "Invalid username or password"}
     except Exception as e:
         print(f"❌ Error verifying user: {e}")
@@ -504,16 +881,15 @@ def verify_user(username: str, password: str) -> Dict:
 def get_user_by_username(username: str) -> Optional[Dict]:
     """Get user details by username."""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT id, username, email, created_at, last_login, is_active 
-        FROM users WHERE username = ?
-        """, (username,))
-        
-        user = cursor.fetchone()
-        conn.close()
+        with reader_conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+            SELECT id, username, email, created_at, last_login, is_active 
+            FROM users WHERE username = ?
+            """, (username,))
+            
+            user = cursor.fetchone()
         
         if user:
             return dict(user)
@@ -528,34 +904,20 @@ def change_password(username: str, current_password: str, new_password: str) ->
     Change user password after verifying current password.
     Returns dict with success status and message.
     """
-    import hashlib
-    
-    current_hash = hashlib.sha256(current_password.encode()).hexdigest()
-    new_hash = hashlib.sha256(new_password.encode()).hexdigest()
-    
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Verify current password
-        cursor.execute("""
-        SELECT id FROM users 
-        WHERE username = ? AND password_hash = ?
-        """, (username, current_hash))
-        
-        user = cursor.fetchone()
-        
-        if not user:
-            conn.close()
-            return {"success": False, "error": "Current password is incorrect"}
-        
-        # Update to new password
-        cursor.execute("""
-        UPDATE users SET password_hash = ? WHERE username = ?
-        """, (new_hash, username))
-        
-        conn.commit()
-        conn.close()
+        with writer_conn(sqlite3.Row) as conn:
+            cursor = conn.cursor()
+            
+            # Verify current password
+            user, _ = _find_user_by_credentials(cursor, username, current_password)
+            
+            if not user:
+                return {"success": False, "error": "Current password is incorrect"}
+            
+            # Update to new password (fresh salt)
+            cursor.execute(_SET_PASSWORD_SQL, (*_new_password_hash(new_password), user['id']))
+            
+            conn.commit()
         
         return {
             "success": True,
@@ -0,0 +1,118 @@
+"""
+Shared Ensemble Definition
+==========================
+Builds the weighted soft voting ensemble used by create_ensemble_model.py
+and both retrain scripts, so a scheduled retrain produces the same model
+configuration as the initial build.
+
+Base Models (with weights):
+- Logistic Regression: 0.25
+- Random Forest: 0.25
+- XGBoost: 0.35 (GradientBoosting if XGBoost is not installed)
+- SVM RBF: 0.15 (Nystroem RBF approximation + logistic regression)
+"""
+
+import os
+import numpy as np
+
+from sklearn.ensemble import VotingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.kernel_approximation import Nystroem
+from sklearn.pipeline import Pipeline
+
+# Try to import XGBoost
+try:
+    from xgboost import XGBClassifier
+    HAS_XGBOOST = True
+except ImportError:
+    print("Warning: XGBoost not installed. Using GradientBoosting instead.")
+    from sklearn.ensemble import GradientBoostingClassifier
+    HAS_XGBOOST = False
+
+# The ensemble fits its four base models in parallel (one worker each, as
+# cores allow), so the multi-threaded learners get an equal share of the
+# cores rather than each claiming all of them
+CPU_COUNT = os.cpu_count() or 1
+ENSEMBLE_JOBS = min(4, CPU_COUNT)
+INNER_JOBS = max(1, CPU_COUNT // ENSEMBLE_JOBS)
+
+# Weights from notebook: LR=0.25, RF=0.25, XGB=0.35, SVM=0.15
+ENSEMBLE_WEIGHTS = [0.25, 0.25, 0.35, 0.15]
+
+
+def create_ensemble(X_train, n_classes: int) -> VotingClassifier:
+    """
+    Create the (unfitted) ensemble, matching notebook Cell 76.
+    X_train is only used to set up the SVM's kernel approximation.
+    """
+    base_models = [
+        ("Logistic Regression", LogisticRegression(
+            solver="lbfgs",
+            C=1.5,
+            max_iter=2000,
+            class_weight="balanced",
+            random_state=42
+        )),
+        ("Random Forest", RandomForestClassifier(
+            n_estimators=350,
+            max_depth=12,
+            min_samples_split=4,
+            min_samples_leaf=2,
+            max_features="sqrt",
+            class_weight="balanced",
+            n_jobs=INNER_JOBS,
+            random_state=42
+        )),
+    ]
+    
+    # Add XGBoost or fallback
+    if HAS_XGBOOST:
+        base_models.append(("XGBoost", XGBClassifier(
+            n_estimators=350,
+            max_depth=5,
+            learning_rate=0.05,
+            subsample=0.9,
+            colsample_bytree=0.9,
+            objective="multi:softprob",
+            num_class=n_classes,
+            eval_metric="mlogloss",
+            tree_method="hist",
+            n_jobs=INNER_JOBS,
+            random_state=42
+        )))
+    else:
+        base_models.append(("GradientBoosting", GradientBoostingClassifier(
+            n_estimators=350,
+            max_depth=5,
+            learning_rate=0.05,
+            subsample=0.9,
+            random_state=42
+        )))
+    
+    # RBF-kernel SVM approximated with Nystroem features + logistic regression.
+    # SVC(probability=True) adds an internal 5-fold Platt calibration to every
+    # fit (and is deprecated in scikit-learn 1.9); here predict_proba comes
+    # straight from the logistic regression.
+    # Nystroem has no gamma="scale", so compute SVC's value explicitly.
+    svm_gamma = 1.0 / (X_train.shape[1] * np.asarray(X_train, dtype=np.float64).var())
+    base_models.append(("SVM (RBF-approx)", Pipeline([
+        ("rbf", Nystroem(
+            kernel="rbf",
+            gamma=svm_gamma,
+            n_components=min(300, len(X_train)),
+            random_state=42
+        )),
+        ("lr", LogisticRegression(
+            C=2.0,
+            class_weight="balanced",
+            max_iter=2000,
+            random_state=42
+        )),
+    ])))
+    
+    return VotingClassifier(
+        estimators=base_models,
+        voting='soft',
+        weights=ENSEMBLE_WEIGHTS,
+        n_jobs=ENSEMBLE_JOBS
+    )
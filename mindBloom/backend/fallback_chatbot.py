@@ -16,12 +16,32 @@ mental health professional.
 
 from __future__ import annotations
 
+import itertools
 import re
 import random
-from typing import Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+    HAS_DATASKETCH = True
+except ImportError:
+    HAS_DATASKETCH = False
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # ----------------------------------------------------------------------
 # Define a set of prompts and their associated responses.
@@ -260,46 +280,341 @@ FAQ: Dict[str, List[str]] = {
     ],
 }
 
-# Precompute the TF-IDF vectors for the FAQ keys
-_vectorizer = TfidfVectorizer().fit(FAQ.keys())
-_faq_matrix = _vectorizer.transform(FAQ.keys())
-_faq_keys = list(FAQ.keys())
+# FAQ keys and responses as parallel tuples: the matcher returns a row
+# index (or -1) and callers index the responses directly.
+_faq_keys: Tuple[str, ...] = tuple(FAQ)
+_faq_responses: Tuple[Tuple[str, ...], ...] = tuple(tuple(responses) for responses in FAQ.values())
+_faq_key_index: Dict[str, int] = {key: idx for idx, key in enumerate(_faq_keys)}
+
+# Similarity needed for a confident match (adjust as needed)
+MATCH_THRESHOLD = 0.25
+
+# The FAQ matrix is scored as int8. Unit-length TF-IDF rows keep every
+# weight in [0, 1], so a fixed scale of 127 leaves about two decimal digits,
+# plenty for comparing against MATCH_THRESHOLD.
+_QUANT_SCALE = 127
+_quant_threshold = MATCH_THRESHOLD * _QUANT_SCALE * _QUANT_SCALE
+
+# Same token pattern as TfidfVectorizer's default, so queries can be
+# vectorized by hand with the fitted vocabulary and IDF weights.
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+# Character 3-gram shingles of each FAQ key. Word-level TF-IDF cannot
+# match misspellings ("helo", "thnak you"), so messages it rejects get a
+# second chance via Jaccard similarity on these shingle sets.
+SHINGLE_SIZE = 3
+SHINGLE_THRESHOLD = 0.3
+
+# With datasketch installed, a MinHash-LSH index narrows the shingle
+# comparison to the few keys sharing a hash band with the message, so the
+# cost no longer grows linearly with the size of the FAQ.
+MINHASH_PERMUTATIONS = 64
+
+
+def _shingles(text: str) -> FrozenSet[str]:
+    """Character n-gram shingles of whitespace-collapsed, space-padded text."""
+    padded = " " + " ".join(text.split()) + " "
+    return frozenset(padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+
+
+def _minhash(shingles: FrozenSet[str]) -> "MinHash":
+    """MinHash signature of a shingle set."""
+    signature = MinHash(num_perm=MINHASH_PERMUTATIONS)
+    signature.update_batch([shingle.encode("utf-8") for shingle in shingles])
+    return signature
+
+
+def _best_candidate(matrix: np.ndarray, rows: np.ndarray, query: np.ndarray) -> Tuple[int, int]:
+    """Position in rows of the highest-scoring FAQ row, and its score.
+
+    Fuses the matvec and argmax into one pass; compiled with numba when
+    available, otherwise the NumPy equivalent is used instead.
+    """
+    best_pos, best_score = -1, -1
+    for pos in range(rows.shape[0]):
+        row = matrix[rows[pos]]
+        score = 0
+        for j in range(query.shape[0]):
+            score += row[j] * query[j]
+        if score > best_score:
+            best_pos, best_score = pos, score
+    return best_pos, best_score
+
+
+if HAS_NUMBA:
+    _best_candidate = njit(cache=True)(_best_candidate)
+
+
+def _token_ids(vocabulary: Dict[str, int], text: str) -> List[int]:
+    """Vocabulary ids of the tokens in lowercased text (unknown tokens dropped)."""
+    return [vocabulary[token] for token in _TOKEN_RE.findall(text) if token in vocabulary]
+
+
+def _tfidf_vector(idf: np.ndarray, token_ids: List[int]) -> np.ndarray:
+    """L2-normalized TF-IDF vector for a token id list, as TfidfVectorizer would."""
+    vector = np.zeros(len(idf), dtype=np.float32)
+    for token_id in token_ids:
+        vector[token_id] += 1.0
+    vector *= idf
+    vector /= np.linalg.norm(vector)
+    return vector
+
+
+class _IntentIndex:
+    """Matching structures built from the FAQ keys.
+
+    Built on the first intent lookup rather than at import, so processes
+    that never reach intent matching (an LLM is configured, or every
+    message is a crisis) skip fitting the vectorizer and importing sklearn.
+    """
+
+    def __init__(self) -> None:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        # The vectorizer is only used to learn the vocabulary and IDF
+        # weights; FAQ rows and queries are then vectorized the same way by
+        # _tfidf_vector, with no sparse intermediate. Rows are L2-normalized,
+        # so a plain dot product already gives the cosine similarity.
+        vectorizer = TfidfVectorizer().fit(_faq_keys)
+        self.vocabulary: Dict[str, int] = dict(vectorizer.vocabulary_)
+        self.idf = vectorizer.idf_.astype(np.float32)
+        faq_token_ids = [_token_ids(self.vocabulary, key) for key in _faq_keys]
+        faq_dense = np.stack([_tfidf_vector(self.idf, ids) for ids in faq_token_ids])
+        self.faq_quant = np.round(faq_dense * _QUANT_SCALE).astype(np.int8)
+
+        # Inverted index: vocabulary id -> indices of the FAQ keys containing
+        # it. Most messages share no vocabulary with the FAQ and can be
+        # rejected before building a query vector at all.
+        self.token_index: Dict[int, List[int]] = {}
+        for idx, ids in enumerate(faq_token_ids):
+            for token_id in set(ids):
+                self.token_index.setdefault(token_id, []).append(idx)
+
+        if HAS_NUMBA:
+            # Compile (or load from cache) now rather than on a user's message
+            _best_candidate(self.faq_quant, np.zeros(1, dtype=np.int64),
+                            np.zeros(len(self.idf), dtype=np.int32))
+
+        self.faq_shingles = [_shingles(key) for key in _faq_keys]
+        self.shingle_lsh: Optional[Any] = None
+        if HAS_DATASKETCH:
+            self.shingle_lsh = MinHashLSH(threshold=SHINGLE_THRESHOLD, num_perm=MINHASH_PERMUTATIONS)
+            for idx, key_shingles in enumerate(self.faq_shingles):
+                self.shingle_lsh.insert(idx, _minhash(key_shingles))
+
+
+_intent_index: Optional[_IntentIndex] = None
+_intent_index_lock = threading.Lock()
+
+
+def _get_intent_index() -> _IntentIndex:
+    """Return the intent index, building it on first use."""
+    global _intent_index
+    if _intent_index is None:
+        with _intent_index_lock:
+            if _intent_index is None:
+                _intent_index = _IntentIndex()
+    return _intent_index
+
+
+# Each FAQ key rotates through a shuffled copy of its responses, so the
+# same reply is never given twice in a row while alternatives remain.
+_response_cycles: List[Iterator[str]] = [
+    itertools.cycle(random.sample(responses, len(responses)))
+    for responses in _faq_responses
+]
+_response_lock = threading.Lock()
+
+
+def _normalize(message: str) -> str:
+    """Canonical form of a message used as the intent cache key."""
+    return message.strip().lower()
 
 
-def _match_intent(message: str) -> str:
+def _match_intent(message: str) -> int:
     """Match the user's message to one of the FAQ keys using cosine similarity.
     
-    Returns an empty string if the similarity is below a threshold.
+    Returns the index of the key in _faq_keys, or -1 if the similarity is
+    below a threshold.
+    """
+    return _match_normalized(_normalize(message))
+
+
+@lru_cache(maxsize=1024)
+def _match_normalized(text: str) -> int:
+    """Cached intent lookup on already-normalized text.
+
+    Only the matched key is cached; the response is still picked per call.
     """
-    text = message.strip().lower()
     if not text:
-        return ""
-    input_vec = _vectorizer.transform([text])
-    similarities = cosine_similarity(input_vec, _faq_matrix)[0]
-    best_idx = similarities.argmax()
-    best_score = similarities[best_idx]
-    # Threshold for a confident match (adjust as needed)
-    if best_score >= 0.25:
-        return _faq_keys[best_idx]
-    return ""
+        return -1
+    index = _get_intent_index()
+    token_ids = _token_ids(index.vocabulary, text)
+    if token_ids:
+        candidates = sorted({idx for token_id in token_ids for idx in index.token_index[token_id]})
+        query = _tfidf_vector(index.idf, token_ids)
+        query_quant = np.round(query * _QUANT_SCALE).astype(np.int32)
+        if HAS_NUMBA:
+            best, best_score = _best_candidate(index.faq_quant, np.array(candidates), query_quant)
+        else:
+            # int32 accumulators: products of two int8 weights overflow int16 sums
+            similarities = index.faq_quant[candidates].astype(np.int32) @ query_quant
+            best = int(np.argmax(similarities))
+            best_score = similarities[best]
+        if best_score >= _quant_threshold:
+            return candidates[best]
+    return _match_shingles(index, text)
+
+
+def _match_intent_batch(messages: List[str]) -> List[int]:
+    """Match many messages at once, scoring all of them with one matrix product.
+
+    Same results as calling _match_intent on each message.
+    """
+    texts = [_normalize(message) for message in messages]
+    results = [-1] * len(texts)
+    index = _get_intent_index()
+    rows, vectors = [], []
+    for pos, text in enumerate(texts):
+        token_ids = _token_ids(index.vocabulary, text) if text else []
+        if token_ids:
+            rows.append(pos)
+            vectors.append(_tfidf_vector(index.idf, token_ids))
+    if rows:
+        queries_quant = np.round(np.stack(vectors) * _QUANT_SCALE).astype(np.int32)
+        # FAQ rows sharing no token with a message score 0, so the overall
+        # argmax is the same as the argmax over inverted-index candidates
+        scores = queries_quant @ index.faq_quant.T.astype(np.int32)
+        best = scores.argmax(axis=1)
+        for pos, best_idx, best_score in zip(rows, best, scores[np.arange(len(rows)), best]):
+            if best_score >= _quant_threshold:
+                results[pos] = int(best_idx)
+    for pos, text in enumerate(texts):
+        if results[pos] < 0 and text:
+            results[pos] = _match_shingles(index, text)
+    return results
+
+
+def _match_shingles(index: _IntentIndex, text: str) -> int:
+    """Typo-tolerant match: best Jaccard similarity over character shingles."""
+    query = _shingles(text)
+    candidates: Iterable[int]
+    if index.shingle_lsh is not None:
+        candidates = sorted(index.shingle_lsh.query(_minhash(query)))
+    else:
+        candidates = range(len(index.faq_shingles))
+    best_idx, best_score = -1, SHINGLE_THRESHOLD
+    for idx in candidates:
+        key_shingles = index.faq_shingles[idx]
+        union = len(query | key_shingles)
+        score = len(query & key_shingles) / union if union else 0.0
+        if score >= best_score:
+            best_idx, best_score = idx, score
+    return best_idx
+
+
+# Crisis keywords (self-harm, suicide, etc.)
+CRISIS_KEYWORDS = (
+    "suicide",
+    "kill myself",
+    "self-harm",
+    "end my life",
+    "hurt myself",
+    "want to die",
+    "harm my baby",
+    "hurt my baby",
+    "hurt my child",
+    "harm my child",
+)
+
+# Phrases that mean the user is asking about their own assessment result
+RISK_KEYWORDS = (
+    "my risk",
+    "my result",
+    "my assessment",
+    "what should i do",
+    "guidance",
+    "help me",
+)
+
+# Both keyword sets are matched in a single pass over the lowercased
+# message: an Aho-Corasick automaton when pyahocorasick is installed,
+# otherwise one compiled regex per set.
+if HAS_AHOCORASICK:
+    _keyword_automaton = ahocorasick.Automaton()
+    for _kw in RISK_KEYWORDS:
+        _keyword_automaton.add_word(_kw, "risk")
+    for _kw in CRISIS_KEYWORDS:
+        _keyword_automaton.add_word(_kw, "crisis")
+    _keyword_automaton.make_automaton()
+else:
+    _CRISIS_RE = re.compile("|".join(map(re.escape, CRISIS_KEYWORDS)))
+    _RISK_RE = re.compile("|".join(map(re.escape, RISK_KEYWORDS)))
+
+
+def _keyword_hits(text: str) -> Tuple[bool, bool]:
+    """Return (crisis, risk) keyword hits for already-lowercased text."""
+    if not HAS_AHOCORASICK:
+        return _CRISIS_RE.search(text) is not None, _RISK_RE.search(text) is not None
+    crisis = risk = False
+    for _end, category in _keyword_automaton.iter(text):
+        if category == "crisis":
+            crisis = True
+        else:
+            risk = True
+        if crisis and risk:
+            break
+    return crisis, risk
 
 
 def _is_crisis(message: str) -> bool:
     """Detect crisis keywords (self-harm, suicide, etc.)."""
-    crisis_keywords = [
-        "suicide",
-        "kill myself",
-        "self-harm",
-        "end my life",
-        "hurt myself",
-        "want to die",
-        "harm my baby",
-        "hurt my baby",
-        "hurt my child",
-        "harm my child"
-    ]
-    text = message.lower()
-    return any(kw in text for kw in crisis_keywords)
+    return _keyword_hits(_normalize(message))[0]
+
+
+# _decide result meaning "answer with the crisis message"
+_CRISIS_ROW = -2
+
+
+@lru_cache(maxsize=4096)
+def _decide(text: str, risk_key: str) -> int:
+    """Decide how to answer a normalized message, cached per (text, risk level).
+
+    Scans for crisis and risk keywords in one pass, then falls through to
+    intent matching. Returns _CRISIS_ROW, the FAQ row to answer from, or -1
+    for the neutral reply. Only the decision is cached; the response text is
+    still picked per call.
+    """
+    is_crisis, asks_about_risk = _keyword_hits(text)
+    if is_crisis:
+        return _CRISIS_ROW
+    # If the user has a risk level, check if they're asking about it
+    risk_idx = _faq_key_index.get(risk_key, -1)
+    if risk_idx >= 0 and asks_about_risk:
+        return risk_idx
+    return _match_normalized(text)
+
+
+def _next_response(idx: int) -> str:
+    """Return the next response in the rotation for an FAQ row."""
+    with _response_lock:
+        return next(_response_cycles[idx])
+
+
+CRISIS_RESPONSE = (
+    "I'm really sorry that you're feeling this way. "
+    "Your safety is the most important thing. "
+    "Please contact a trusted friend, family member or a crisis hotline in your area immediately. "
+    "If you're in Bangladesh, you can call the Kaan Pete Roi helpline at 01742441122 (8 pm–12 am). "
+    "In the US, dial 988 for the Suicide and Crisis Lifeline."
+)
+
+NEUTRAL_RESPONSE = (
+    "Thank you for sharing. I'm here to listen and support you. "
+    "Could you tell me a bit more about what's on your mind? "
+    "I can help with questions about postpartum depression, self-care tips, "
+    "coping strategies, or just be here to listen."
+)
 
 
 def get_fallback_response(message: str, risk_level: Optional[str] = None) -> str:
@@ -315,37 +630,60 @@ def get_fallback_response(message: str, risk_level: Optional[str] = None) -> str
     """
     message = message or ""
     
+    decision = _decide(_normalize(message), risk_level.lower() if risk_level else "")
+
     # Crisis handling first
-    if _is_crisis(message):
-        return (
-            "I'm really sorry that you're feeling this way. "
-            "Your safety is the most important thing. "
-            "Please contact a trusted friend, family member or a crisis hotline in your area immediately. "
-            "If you're in Bangladesh, you can call the Kaan Pete Roi helpline at 01742441122 (8 pm–12 am). "
-            "In the US, dial 988 for the Suicide and Crisis Lifeline."
-        )
+    if decision == _CRISIS_ROW:
+        return CRISIS_RESPONSE
     
-    # Check if user is asking about their specific risk level
-    if risk_level and risk_level.lower() in FAQ:
-        # User has a risk level, check if they're asking about it
-        risk_keywords = ["my risk", "my result", "my assessment", "what should i do", "guidance", "help me"]
-        if any(kw in message.lower() for kw in risk_keywords):
-            responses = FAQ[risk_level.lower()]
-            return random.choice(responses)
-    
-    # Try to match intent
-    key = _match_intent(message)
-    if key:
-        responses = FAQ[key]
-        return random.choice(responses)
+    # Risk-level guidance or a matched intent
+    if decision >= 0:
+        return _next_response(decision)
     
     # Neutral fallback if we can't match the intent
-    return (
-        "Thank you for sharing. I'm here to listen and support you. "
-        "Could you tell me a bit more about what's on your mind? "
-        "I can help with questions about postpartum depression, self-care tips, "
-        "coping strategies, or just be here to listen."
-    )
+    return NEUTRAL_RESPONSE
+
+
+def get_fallback_response_batch(messages: List[str], risk_level: Optional[str] = None) -> List[str]:
+    """
+    Batch version of get_fallback_response, e.g. for re-scoring a conversation.
+    
+    Crisis and risk-level checks run per message as usual; the remaining
+    messages are intent-matched together in one matrix product.
+    
+    Args:
+        messages: User messages
+        risk_level: Optional risk level (low/medium/high) applied to every message
+    
+    Returns:
+        One chatbot response string per message
+    """
+    risk_idx = _faq_key_index.get(risk_level.lower(), -1) if risk_level else -1
+    decisions: List[int] = []
+    pending: List[int] = []
+    for pos, message in enumerate(messages):
+        is_crisis, asks_about_risk = _keyword_hits(_normalize(message or ""))
+        if is_crisis:
+            decisions.append(_CRISIS_ROW)
+        elif risk_idx >= 0 and asks_about_risk:
+            decisions.append(risk_idx)
+        else:
+            decisions.append(-1)
+            pending.append(pos)
+    if pending:
+        matched = _match_intent_batch([messages[pos] or "" for pos in pending])
+        for pos, idx in zip(pending, matched):
+            decisions[pos] = idx
+
+    responses = []
+    for decision in decisions:
+        if decision == _CRISIS_ROW:
+            responses.append(CRISIS_RESPONSE)
+        elif decision >= 0:
+            responses.append(_next_response(decision))
+        else:
+            responses.append(NEUTRAL_RESPONSE)
+    return responses
 
 
 # For direct import as a handler function
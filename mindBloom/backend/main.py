@@ -1,16 +1,17 @@
 import os
 import uuid
 import io
+import importlib.util
 from typing import Any, Dict, Optional, List
 
 import joblib
 import pandas as pd
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
-from fastapi.responses import HTMLResponse
-from admin_dashboard import get_admin_dashboard
+from fastapi.responses import HTMLResponse, Response
+from admin_dashboard import get_admin_dashboard, dashboard_etag, etag_matches, DASHBOARD_CSS, DASHBOARD_CSS_HEADERS
 
 # Import new online learning modules
 from database import init_db, save_prediction, save_feedback, schedule_follow_up, get_statistics, create_user, verify_user, change_password
@@ -20,6 +21,10 @@ from shap_explainer import initialize_shap_explainer, get_shap_values, get_risk_
 # Import chat router for conversational endpoint
 from chat import router as chat_router
 
+# pyarrow is optional; it parses uploaded CSVs with a multithreaded reader
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+UPLOAD_CSV_ENGINE = "pyarrow" if HAS_PYARROW else "c"
+
 app = FastAPI(title="PPD Predictor API", version="1.0")
 
 # Include chat router for /chat endpoint
@@ -484,6 +489,17 @@ def get_collection_statistics():
 # BATCH CSV UPLOAD AND ASSESSMENT
 # ============================================================================
 
+def _read_upload_csv(contents: bytes) -> pd.DataFrame:
+    """Parse an uploaded CSV, with pyarrow's reader when it is installed."""
+    try:
+        return pd.read_csv(io.BytesIO(contents), engine=UPLOAD_CSV_ENGINE)
+    except Exception:
+        if UPLOAD_CSV_ENGINE == "c":
+            raise
+    # pyarrow rejected the file: retry with the default parser, which is more lenient
+    return pd.read_csv(io.BytesIO(contents))
+
+
 @app.post("/batch-assess")
 async def batch_assess(file: UploadFile = File(...), save_to_log: bool = True):
     """
@@ -503,7 +519,7 @@ async def batch_assess(file: UploadFile = File(...), save_to_log: bool = True):
     # Read uploaded CSV
     try:
         contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
+        df = _read_upload_csv(contents)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to read CSV file: {e}")
     
@@ -514,6 +530,11 @@ async def batch_assess(file: UploadFile = File(...), save_to_log: bool = True):
     aggregate_risk = {"high": 0, "medium": 0, "low": 0}
     all_shap_features = []
     
+    # Pass 1: derive and clean model inputs row by row. Successful rows are
+    # kept (with their slot in results) so they can be scored in one batch.
+    prepared = []
+    expected_cols = getattr(model, "feature_names_in_", None)
+    
     for idx, row in df.iterrows():
         try:
             # Convert row to dict and clean values
@@ -544,7 +565,6 @@ async def batch_assess(file: UploadFile = File(...), save_to_log: bool = True):
                 continue
             
             # Build DataFrame for model
-            expected_cols = getattr(model, "feature_names_in_", None)
             if expected_cols is not None:
                 model_df = pd.DataFrame([{col: derived_features.get(col) for col in expected_cols}])
             else:
@@ -556,20 +576,58 @@ async def batch_assess(file: UploadFile = File(...), save_to_log: bool = True):
                     model_df[c] = model_df[c].astype(str).str.strip().str.lower()
                     model_df[c] = model_df[c].replace({"nan": None, "none": None, "": None})
             
+            prepared.append((len(results), idx, derived_features, model_df))
+            results.append(None)
+            
+        except Exception as e:
+            results.append({
+                "row": idx,
+                "status": "error",
+                "error": str(e)
+            })
+    
+    # Pass 2: one predict / predict_proba call for all prepared rows instead
+    # of two per row. If the batch cannot be scored, rows fall back to being
+    # predicted one at a time so a single bad row only fails itself.
+    batch_preds = None
+    batch_probs = None
+    if prepared:
+        try:
+            batch_df = pd.concat([p[3] for p in prepared], ignore_index=True)
+            batch_preds = model.predict(batch_df)
+            if hasattr(model, "predict_proba"):
+                try:
+                    batch_probs = model.predict_proba(batch_df)
+                except Exception:
+                    pass
+        except Exception:
+            batch_preds = None
+    
+    classes = list(getattr(model, "classes_", ["high", "low", "medium"]))
+    
+    # Pass 3: per-row labels, SHAP explanations and logging
+    for k, (slot, idx, derived_features, model_df) in enumerate(prepared):
+        try:
             # Make prediction
-            pred_idx = model.predict(model_df)[0]
-            classes = list(getattr(model, "classes_", ["high", "low", "medium"]))
+            if batch_preds is not None:
+                pred_idx = batch_preds[k]
+            else:
+                pred_idx = model.predict(model_df)[0]
             risk_label = str(classes[pred_idx]) if pred_idx < len(classes) else str(pred_idx)
             
             # Get probabilities
             probabilities = None
-            if hasattr(model, "predict_proba"):
+            if batch_preds is not None:
+                probs = batch_probs[k] if batch_probs is not None else None
+            elif hasattr(model, "predict_proba"):
                 try:
                     probs = model.predict_proba(model_df)[0]
-                    if classes and len(classes) == len(probs):
-                        probabilities = {str(classes[i]): float(probs[i]) for i in range(len(classes))}
                 except Exception:
-                    pass
+                    probs = None
+            else:
+                probs = None
+            if probs is not None and classes and len(classes) == len(probs):
+                probabilities = {str(classes[i]): float(probs[i]) for i in range(len(classes))}
             
             # Get SHAP values
             shap_explanation = None
@@ -596,20 +654,20 @@ async def batch_assess(file: UploadFile = File(...), save_to_log: bool = True):
                 except Exception:
                     pass
             
-            results.append({
+            results[slot] = {
                 "row": idx,
                 "status": "success",
                 "risk_level": risk_label,
                 "probabilities": probabilities,
                 "shap_explanation": shap_explanation,
-            })
+            }
             
         except Exception as e:
-            results.append({
+            results[slot] = {
                 "row": idx,
                 "status": "error",
                 "error": str(e)
-            })
+            }
     
     # Calculate aggregate SHAP summary
     aggregate_shap = _aggregate_shap_features(all_shap_features)
@@ -963,6 +1021,19 @@ def trigger_retrain_now():
 # ============================================================================
 
 @app.get("/admin/dashboard", response_class=HTMLResponse)
-def admin_dashboard():
+def admin_dashboard(request: Request):
     """Admin dashboard for monitoring online learning."""
-    return get_admin_dashboard()
\ No newline at end of file
+    stats = get_statistics()
+    # The page only changes with the stats: let the 60 s auto-refresh
+    # revalidate and get a 304 while they are unchanged. The stats (and so the
+    # ETag) are needed before any status is sent, so the page is not streamed.
+    headers = {"ETag": dashboard_etag(stats), "Cache-Control": "private, max-age=30"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(get_admin_dashboard(stats), headers=headers)
+
+
+@app.get("/admin/dashboard.css")
+def admin_dashboard_css():
+    """Admin dashboard stylesheet (static, cached by the browser)."""
+    return Response(DASHBOARD_CSS, media_type="text/css", headers=DASHBOARD_CSS_HEADERS)
\ No newline at end of file
@@ -24,19 +24,11 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 
-from sklearn.ensemble import VotingClassifier, RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 
-# Try XGBoost
-try:
-    from xgboost import XGBClassifier
-    HAS_XGBOOST = True
-except ImportError:
-    HAS_XGBOOST = False
+from ensemble_models import create_ensemble
 
 # Paths
 BACKEND_DIR = Path(__file__).parent
@@ -116,68 +108,6 @@ def load_google_form_data(csv_path: str, label_column: str = "EPDS Result"):
     return X, y
 
 
-def create_ensemble(n_classes: int):
-    """Create the ensemble model architecture."""
-    base_models = [
-        ("Logistic Regression", LogisticRegression(
-            solver="lbfgs",
-            C=1.5,
-            max_iter=2000,
-            class_weight="balanced",
-            random_state=42
-        )),
-        ("Random Forest", RandomForestClassifier(
-            n_estimators=350,
-            max_depth=12,
-            min_samples_split=4,
-            min_samples_leaf=2,
-            max_features="sqrt",
-            class_weight="balanced",
-            n_jobs=-1,
-            random_state=42
-        )),
-    ]
-    
-    if HAS_XGBOOST:
-        base_models.append(("XGBoost", XGBClassifier(
-            n_estimators=350,
-            max_depth=5,
-            learning_rate=0.05,
-            subsample=0.9,
-            colsample_bytree=0.9,
-            objective="multi:softprob",
-            num_class=n_classes,
-            eval_metric="mlogloss",
-            random_state=42
-        )))
-    else:
-        base_models.append(("GradientBoosting", GradientBoostingClassifier(
-            n_estimators=350,
-            max_depth=5,
-            learning_rate=0.05,
-            subsample=0.9,
-            random_state=42
-        )))
-    
-    base_models.append(("SVM (RBF)", SVC(
-        kernel="rbf",
-        C=2.0,
-        gamma="scale",
-        class_weight="balanced",
-        probability=True,
-        random_state=42
-    )))
-    
-    weights = [0.25, 0.25, 0.35, 0.15]
-    
-    return VotingClassifier(
-        estimators=base_models,
-        voting='soft',
-        weights=weights,
-        n_jobs=-1
-    )
-
-
 def retrain(google_form_csv: str = None, merge_feedback: bool = True):
     """Main retraining function."""
     print("=" * 80)
@@ -231,7 +161,10 @@ def retrain(google_form_csv: str = None, merge_feedback: bool = True):
     
     # Create and train new ensemble
     print("\n[6] Training new ensemble model...")
-    ensemble = create_ensemble(len(le.classes_))
+    # Single float32 block, as in create_ensemble_model.py
+    X_combined = X_combined.astype(np.float32)
+    X_test = X_test.astype(np.float32)
+    ensemble = create_ensemble(X_combined, len(le.classes_))
     ensemble.fit(X_combined, y_combined)
     ensemble.classes_ = le.classes_
     
@@ -245,7 +178,7 @@ def retrain(google_form_csv: str = None, merge_feedback: bool = True):
     
     # Save
     print("\n[8] Saving new model...")
-    joblib.dump(ensemble, old_model_path)
+    joblib.dump(ensemble, old_model_path, compress=3)
     print(f"    Saved to: {old_model_path}")
     
     print("\n" + "=" * 80)
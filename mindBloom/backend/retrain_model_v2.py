@@ -11,13 +11,11 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
-from sklearn.ensemble import VotingClassifier, RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, classification_report
 import logging
 
 from database import get_predictions_with_feedback
+from ensemble_models import create_ensemble
 
 logging.basicConfig(level=logging. INFO)
 logger = logging.getLogger(__name__)
@@ -78,7 +76,7 @@ def get_new_feedback_data(le):
     
     feature_cols = [c for c in df.columns if c not in 
                    ['id', 'timestamp', 'session_id', 'user_email', 'user_phone',
-                    'predicted_label', 'predicted_probabilities', 'confidence',
+                    'predicted_label', 'predicted_probabilities', 'confidence', 'prob_high',
                     'follow_up_status', 'created_at', 'actual_outcome', 
                     'feedback_notes', 'clinician_validated']]
     
@@ -91,36 +89,6 @@ def get_new_feedback_data(le):
     return X_new, y_new_enc
 
 
-def create_ensemble():
-    """Create ensemble model."""
-    base_models = [
-        ("LogisticRegression", LogisticRegression(
-            solver="lbfgs", C=1.5, max_iter=2000,
-            class_weight="balanced", random_state=42
-        )),
-        ("RandomForest", RandomForestClassifier(
-            n_estimators=350, max_depth=12, min_samples_split=4,
-            min_samples_leaf=2, max_features="sqrt",
-            class_weight="balanced", n_jobs=-1, random_state=42
-        )),
-        ("GradientBoosting", GradientBoostingClassifier(
-            n_estimators=350, max_depth=5, learning_rate=0.05,
-            subsample=0.9, random_state=42
-        )),
-        ("SVM", SVC(
-            kernel="rbf", C=2.0, gamma="scale",
-            class_weight="balanced", probability=True, random_state=42
-        ))
-    ]
-    
-    return VotingClassifier(
-        estimators=base_models,
-        voting='soft',
-        weights=[0.25, 0.25, 0.35, 0.15],
-        n_jobs=-1
-    )
-
-
 def retrain():
     """Main retraining function."""
     logger.info("=" * 80)
@@ -153,7 +121,10 @@ def retrain():
             logger.info(f"[4/5] Backed up old model")
         
         logger.info("[5/5] Training new ensemble...")
-        ensemble = create_ensemble()
+        # Single float32 block, as in create_ensemble_model.py
+        X_combined = X_combined.astype(np.float32)
+        X_test = X_test.astype(np.float32)
+        ensemble = create_ensemble(X_combined, len(le.classes_))
         ensemble.fit(X_combined, y_combined)
         ensemble.classes_ = le.classes_
         
@@ -164,7 +135,7 @@ def retrain():
         logger.info("\n  Classification Report:")
         logger.info(classification_report(y_test, y_pred, target_names=le.classes_))
         
-        joblib.dump(ensemble, old_model_path)
+        joblib.dump(ensemble, old_model_path, compress=3)
         logger.info(f"\n✅ Model saved!")
         logger.info("🎉 Retraining complete!")
         
@@ -5,6 +5,7 @@ Runs background tasks:
 1. Check for due follow-ups daily
 2. Auto-retrain model with configurable frequency
 3. Monitor data quality
+4. Refresh the dashboard stats snapshot
 
 Usage in main.py:
     from scheduler import start_scheduler
@@ -16,6 +17,7 @@ Usage in main.py:
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 import logging
 import subprocess
@@ -23,7 +25,10 @@ from pathlib import Path
 import json
 from typing import Optional
 
-from database import get_pending_follow_ups, export_for_retraining, get_statistics
+from database import (
+    get_pending_follow_ups, export_for_retraining, get_statistics,
+    refresh_dashboard_stats, DASHBOARD_STATS_INTERVAL_SECONDS
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -247,6 +252,14 @@ def monitor_data_quality():
         logger.error(f"Error in monitor_data_quality: {e}")
 
 
+def update_dashboard_stats():
+    """Rewrite the dashboard_stats row read by get_statistics()."""
+    try:
+        refresh_dashboard_stats()
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard stats: {e}")
+
+
 def start_scheduler():
     """Start the background scheduler."""
     global _scheduler
@@ -297,6 +310,16 @@ def start_scheduler():
         replace_existing=True
     )
     
+    # Dashboard stats snapshot (refreshed right away, then every 30 s)
+    _scheduler.add_job(
+        update_dashboard_stats,
+        IntervalTrigger(seconds=DASHBOARD_STATS_INTERVAL_SECONDS),
+        id='dashboard_stats',
+        name='Dashboard Stats Refresh',
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+    
     _scheduler.start()
     logger.info("[OK] Background scheduler started!")
     logger.info("   - Daily follow-ups: 8:00 AM")
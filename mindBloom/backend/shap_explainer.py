@@ -13,11 +13,70 @@ import pandas as pd
 from typing import Dict, List, Any, Optional
 import os
 
+try:
+    import shap
+except ImportError:
+    shap = None
+
+try:
+    import fasttreeshap
+except ImportError:
+    fasttreeshap = None
+
 # Global variables to cache explainer (created once at startup)
 _shap_explainer = None
 _model = None
 _explainer_type = None  # "tree", "kernel", or "permutation"
 _feature_names = None
+_feature_names_tuple = ()  # immutable copy of _feature_names, reused per call
+_feature_index = None  # pd.Index of _feature_names, for aligning instances
+_expected_value_base = 0.0  # explainer base value, resolved once at startup
+
+
+def _make_tree_explainer(est):
+    """
+    Build a tree explainer for est, preferring FastTreeSHAP when installed.
+    
+    FastTreeSHAP's v2 algorithm returns the same values as shap.TreeExplainer
+    at a fraction of the per-sample cost, in exchange for preprocessing each
+    tree once here at startup.
+    """
+    if fasttreeshap is None:
+        return shap.TreeExplainer(est)
+    
+    try:
+        return fasttreeshap.TreeExplainer(est, algorithm="v2", n_jobs=1, shortcut=False)
+    except Exception as e:
+        print(f"[SHAP] FastTreeSHAP failed, using shap.TreeExplainer: {e}")
+        return shap.TreeExplainer(est)
+
+
+def _top_k_indices(values: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the top_k largest values, largest first, in O(n).
+    
+    Ties keep their original order, matching a stable descending sort.
+    """
+    n = len(values)
+    k = max(0, min(top_k, n))
+    if k < n:
+        kth = np.partition(values, n - k)[n - k] if k else np.inf
+        idx = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[:k - len(idx)]
+        idx = np.concatenate([idx, ties])
+    else:
+        idx = np.arange(n)
+    return idx[np.lexsort((idx, -values[idx]))]
+
+
+def _get_expected_value(explainer) -> float:
+    """Base value of the explained class (class 1 for multi-output models)."""
+    if not hasattr(explainer, "expected_value"):
+        return 0.0
+    ev = explainer.expected_value
+    if isinstance(ev, (list, np.ndarray)):
+        return float(ev[1]) if len(ev) > 1 else float(ev[0])
+    return float(ev)
 
 
 def initialize_shap_explainer(model, background_sample_size: int = 100) -> None:
@@ -28,11 +87,9 @@ def initialize_shap_explainer(model, background_sample_size: int = 100) -> None:
         model: Trained sklearn model (ensemble or classifier)
         background_sample_size: Number of samples to use for SHAP background
     """
-    global _shap_explainer, _model, _explainer_type, _feature_names
+    global _shap_explainer, _model, _explainer_type, _feature_names, _feature_names_tuple, _feature_index, _expected_value_base
     
-    try:
-        import shap
-    except ImportError:
+    if shap is None:
         print("[WARN] SHAP library not installed. Install with: pip install shap")
         _shap_explainer = None
         return
@@ -43,6 +100,8 @@ def initialize_shap_explainer(model, background_sample_size: int = 100) -> None:
     _feature_names = getattr(model, "feature_names_in_", None)
     if _feature_names is not None:
         _feature_names = list(_feature_names)
+        _feature_names_tuple = tuple(_feature_names)
+        _feature_index = pd.Index(_feature_names_tuple)
         print(f"[SHAP] Model has {len(_feature_names)} features")
     
     # Try different explainer types in order of preference
@@ -54,13 +113,15 @@ def initialize_shap_explainer(model, background_sample_size: int = 100) -> None:
             # VotingClassifier or ensemble - try to use first tree-based estimator
             for name, est in (model.named_estimators_.items() if hasattr(model, "named_estimators_") else enumerate(model.estimators_)):
                 if hasattr(est, "tree_") or hasattr(est, "estimators_"):
-                    _shap_explainer = shap.TreeExplainer(est)
+                    _shap_explainer = _make_tree_explainer(est)
                     _explainer_type = "tree"
+                    _expected_value_base = _get_expected_value(_shap_explainer)
                     print(f"[SHAP] TreeExplainer initialized using {name if isinstance(name, str) else 'estimator'}")
                     return
         elif hasattr(model, "tree_") or hasattr(model, "feature_importances_"):
-            _shap_explainer = shap.TreeExplainer(model)
+            _shap_explainer = _make_tree_explainer(model)
             _explainer_type = "tree"
+            _expected_value_base = _get_expected_value(_shap_explainer)
             print("[SHAP] TreeExplainer initialized successfully")
             return
     except Exception as e:
@@ -81,6 +142,7 @@ def initialize_shap_explainer(model, background_sample_size: int = 100) -> None:
                 feature_names=_feature_names
             )
             _explainer_type = "permutation"
+            _expected_value_base = _get_expected_value(_shap_explainer)
             print("[SHAP] Permutation Explainer initialized successfully")
             return
     except Exception as e:
@@ -118,16 +180,11 @@ def get_shap_values(
         return _get_fallback_importance(instance_df, top_k)
     
     try:
-        import shap
-        
-        # Ensure instance has the right columns
-        if _feature_names:
-            # Add missing columns with zeros
-            for col in _feature_names:
-                if col not in instance_df.columns:
-                    instance_df[col] = 0
-            # Reorder columns to match model
-            instance_df = instance_df[_feature_names]
+        # Ensure instance has the right columns: add missing ones as zeros
+        # and reorder to match the model, in one reindex. Callers usually
+        # pass frames already built in model order, which skip this.
+        if _feature_names and not instance_df.columns.equals(_feature_index):
+            instance_df = instance_df.reindex(columns=_feature_index, fill_value=0.0)
         
         # Compute SHAP values
         if _explainer_type == "tree":
@@ -151,36 +208,28 @@ def get_shap_values(
         # Ensure 1D
         shap_vals = np.array(shap_vals).flatten()
         
-        # Get base value
-        base_value = 0.0
-        if hasattr(_shap_explainer, "expected_value"):
-            ev = _shap_explainer.expected_value
-            if isinstance(ev, (list, np.ndarray)):
-                base_value = float(ev[1]) if len(ev) > 1 else float(ev[0])
-            else:
-                base_value = float(ev)
-        
-        # Build importance list
-        feature_names = instance_df.columns.tolist()
-        feature_values = instance_df.iloc[0].tolist()
+        # Pick the top_k features by absolute SHAP value, then build
+        # dicts only for those
+        # Once aligned, the columns are exactly the model's feature names
+        feature_names = _feature_names_tuple if _feature_names else instance_df.columns.tolist()
+        feature_values = instance_df.iloc[0].to_numpy()
+        abs_vals = np.abs(shap_vals[:len(feature_names)])
         
-        importance_list = []
-        for fname, fval, sval in zip(feature_names, feature_values, shap_vals):
-            importance_list.append({
-                "feature": str(fname),
+        top_features = []
+        for i in _top_k_indices(abs_vals, top_k):
+            fval = feature_values[i]
+            sval = shap_vals[i]
+            top_features.append({
+                "feature": str(feature_names[i]),
                 "shap_value": float(sval),
-                "feature_value": float(fval) if isinstance(fval, (int, float, np.number)) else str(fval),
-                "abs_shap_value": float(abs(sval)),
+                "feature_value": float(fval) if isinstance(fval, (int, float, np.number, np.bool_)) else str(fval),
+                "abs_shap_value": float(abs_vals[i]),
                 "impact": "increases_risk" if sval > 0 else ("decreases_risk" if sval < 0 else "neutral")
             })
         
-        # Sort by absolute value and get top_k
-        importance_list.sort(key=lambda x: x["abs_shap_value"], reverse=True)
-        top_features = importance_list[:top_k]
-        
         return {
             "success": True,
-            "base_value": base_value,
+            "base_value": _expected_value_base,
             "top_features": top_features,
             "total_features_analyzed": len(feature_names),
             "shap_values_available": True,
@@ -203,29 +252,30 @@ def _get_fallback_importance(instance_df: pd.DataFrame, top_k: int = 10) -> Dict
     try:
         # Try to use model's feature importances
         if hasattr(_model, "feature_importances_"):
-            importances = _model.feature_importances_
             feature_names = _feature_names or instance_df.columns.tolist()
+            n_features = min(len(feature_names), len(_model.feature_importances_))
+            importances = np.asarray(_model.feature_importances_[:n_features], dtype=float)
+            columns = instance_df.columns
+            row_values = instance_df.iloc[0].to_numpy()
             
-            # Match importances to features in instance
-            importance_list = []
-            for i, fname in enumerate(feature_names):
-                if i < len(importances):
-                    fval = instance_df[fname].iloc[0] if fname in instance_df.columns else 0
-                    importance_list.append({
-                        "feature": str(fname),
-                        "shap_value": float(importances[i]),  # Not true SHAP, but feature importance
-                        "feature_value": float(fval) if isinstance(fval, (int, float, np.number)) else str(fval),
-                        "abs_shap_value": float(importances[i]),
-                        "impact": "increases_risk" if fval > 0 else "decreases_risk"
-                    })
-            
-            importance_list.sort(key=lambda x: x["abs_shap_value"], reverse=True)
+            # Match importances to features in instance, for the top_k only
+            top_features = []
+            for i in _top_k_indices(importances, top_k):
+                fname = feature_names[i]
+                fval = row_values[columns.get_loc(fname)] if fname in columns else 0
+                top_features.append({
+                    "feature": str(fname),
+                    "shap_value": float(importances[i]),  # Not true SHAP, but feature importance
+                    "feature_value": float(fval) if isinstance(fval, (int, float, np.number)) else str(fval),
+                    "abs_shap_value": float(importances[i]),
+                    "impact": "increases_risk" if fval > 0 else "decreases_risk"
+                })
             
             return {
                 "success": True,
                 "base_value": 0.0,
-                "top_features": importance_list[:top_k],
-                "total_features_analyzed": len(importance_list),
+                "top_features": top_features,
+                "total_features_analyzed": n_features,
                 "shap_values_available": False,
                 "explainer_type": "feature_importance_fallback",
                 "note": "Using model feature importances (not true SHAP values)"
@@ -233,8 +283,7 @@ def _get_fallback_importance(instance_df: pd.DataFrame, top_k: int = 10) -> Dict
         
         # Last resort: use non-zero feature values as proxy
         feature_values = []
-        for col in instance_df.columns:
-            val = instance_df[col].iloc[0]
+        for col, val in zip(instance_df.columns, instance_df.iloc[0].to_numpy()):
             if isinstance(val, (int, float, np.number)) and val != 0:
                 feature_values.append({
                     "feature": str(col),